@@ -1,10 +1,12 @@
+import asyncio
+import functools
 import html
 import re
 import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Sequence
 
-from aiogram import Bot, types
+from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import (
     ChatPermissions,
@@ -12,33 +14,59 @@ from aiogram.types import (
     InlineKeyboardMarkup,
     LinkPreviewOptions,
     Message,
+    User,
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+import config
 from config import redis_client
 from database.meeting import (
-    create_meeting_history,
+    get_meeting_histories,
     get_meeting_settings,
-    get_user_meeting_history,
-    update_meeting_message,
+    upsert_meeting_histories,
 )
-from database.warns import add_warn, get_warn_settings, get_warns_count, reset_warns
+from database.warns import get_warn_settings, register_warn
 from keyboards.moderationKeyboards import get_moderation_action_kb
+from utils.actionQueue import action_queue
+from utils.adminRights import can_restrict
+from utils.messageDeleter import message_deleter
 
 
 TEXTS = {
+    # Наказание выполняется очередью действий позже, поэтому ответ говорит
+    # только о постановке в очередь.
     "punishments": {
-        "mute": "🔇 Мут {}.",
-        "ban": "🚫 Бан {}",
-        "kick": "👢 Кик из чата.",
+        "mute": "🔇 Мут {} поставлен в очередь",
+        "ban": "🚫 Бан {} поставлен в очередь",
+        "kick": "👢 Кик из чата поставлен в очередь",
+        "not_queued": (
+            "⏳ Наказание не поставлено: такое же уже ждёт выполнения "
+            "или очередь переполнена"
+        ),
         "error": "❌ Ошибка: {}",
     },
+    "errors": {"invalid_time": "❌ Неверный формат времени."},
     "default_text": "%%__mention__%% [%%__user_id__%%] предупрежден (%%__warn_count__%%/%%__max_warns__%%).",
     "warnings": {
         "max_reached": "🚨 {} Достиг максимального количества предупреждений.\n{}!"
     },
 }
 
+MUTED_PERMISSIONS = ChatPermissions(
+    can_send_messages=False,
+    can_send_photos=False,
+    can_send_videos=False,
+    can_send_voice_notes=False,
+    can_send_video_notes=False,
+    can_send_media_messages=False,
+    can_send_polls=False,
+    can_send_other_messages=False,
+    can_add_web_page_previews=False,
+    can_change_info=False,
+    can_invite_users=False,
+    can_pin_messages=False,
+)
+
 
 async def parse_command(message: Message):
 
@@ -181,19 +209,7 @@ async def format_duration(duration: str) -> str:
 
 
 async def has_promote_rights(message) -> bool:
-    admins = await message.bot.get_chat_administrators(chat_id=message.chat.id)
-
-    for admin in admins:
-        if admin.user.id == message.from_user.id:
-            if (
-                isinstance(admin, types.ChatMemberAdministrator)
-                and admin.can_restrict_members
-            ):
-                return True
-            if isinstance(admin, types.ChatMemberOwner):
-                return True
-
-    return False
+    return await can_restrict(message.bot, message.chat.id, message.from_user.id)
 
 
 async def format_text(
@@ -229,6 +245,35 @@ async def format_text(
     )
 
 
+async def format_members_text(
+    template: str, message: Message, members: Sequence[User]
+) -> str:
+    """format_text для нескольких участников сразу: упоминания через запятую."""
+    if len(members) > 1:
+        template = (
+            template.replace(
+                "%%__mention__%%",
+                ", ".join(
+                    f"<a href='tg://user?id={member.id}'>"
+                    f"{html.escape(member.first_name)}</a>"
+                    for member in members
+                ),
+            )
+            .replace(
+                "%%__full_name__%%",
+                html.escape(", ".join(member.first_name for member in members)),
+            )
+            .replace("%%__user_id__%%", ", ".join(str(member.id) for member in members))
+        )
+
+    return await format_text(
+        template=template,
+        message=message,
+        target_user_id=members[0].id,
+        target_first_name=members[0].first_name,
+    )
+
+
 async def format_buttons(input_text: str) -> dict | bool:
     try:
         if not isinstance(input_text, str) or not input_text.strip():
@@ -280,52 +325,77 @@ async def format_keyboard(json_data):
     return builder.as_markup()
 
 
+async def _ban_and_unban(bot: Bot, chat_id: int, user_id: int) -> None:
+    await bot.ban_chat_member(chat_id, user_id)
+    await bot.unban_chat_member(chat_id, user_id)
+
+
+def enqueue_punishment(
+    bot: Bot, chat_id: int, user_id: int, action: str, until_date: Optional[int]
+) -> bool:
+    """Ставит мут, бан или кик в очередь действий; повторный такой же не ставится."""
+    if action == "mute":
+        call = functools.partial(
+            bot.restrict_chat_member,
+            chat_id=chat_id,
+            user_id=user_id,
+            permissions=MUTED_PERMISSIONS,
+            use_independent_chat_permissions=False,
+            until_date=until_date,
+        )
+    elif action == "ban":
+        call = functools.partial(
+            bot.ban_chat_member, chat_id, user_id, until_date=until_date
+        )
+    elif action == "kick":
+        call = functools.partial(_ban_and_unban, bot, chat_id, user_id)
+    else:
+        return False
+
+    return action_queue.enqueue(
+        chat_id, call, key=(action, chat_id, user_id), description=action
+    )
+
+
+def _notify(msg: Message, user_id: int, kind: str, text: str, reply_markup) -> None:
+    action_queue.enqueue(
+        msg.chat.id,
+        functools.partial(
+            msg.answer, text, parse_mode="HTML", reply_markup=reply_markup
+        ),
+        key=("notify", msg.chat.id, user_id, kind),
+        description=f"{kind} message",
+    )
+
+
 async def apply_punishment(bot, chat_id: int, user_id: int, action: str, duration):
     try:
+        # Длительность в настройках бывает и строкой, и числом секунд.
         if duration == "forever":
             until_date = None
             duration_str = "навсегда"
-        elif isinstance(duration, str) and duration.isdigit():
+        elif str(duration).isdigit():
             seconds = int(duration)
             until_date = datetime.now() + timedelta(seconds=seconds)
             duration_str = until_date.strftime("%Y-%m-%d")
         else:
             return TEXTS["errors"]["invalid_time"]
 
+        queued = enqueue_punishment(
+            bot,
+            chat_id,
+            user_id,
+            "kick" if action not in ("mute", "ban") else action,
+            int(until_date.timestamp()) if until_date else None,
+        )
+
+        if not queued:
+            return TEXTS["punishments"]["not_queued"]
         if action == "mute":
-            await bot.restrict_chat_member(
-                chat_id=chat_id,
-                user_id=user_id,
-                permissions=ChatPermissions(
-                    can_send_messages=False,
-                    can_send_photos=False,
-                    can_send_videos=False,
-                    can_send_voice_notes=False,
-                    can_send_video_notes=False,
-                    can_send_media_messages=False,
-                    can_send_polls=False,
-                    can_send_other_messages=False,
-                    can_add_web_page_previews=False,
-                    can_change_info=False,
-                    can_invite_users=False,
-                    can_pin_messages=False,
-                ),
-                use_independent_chat_permissions=False,
-                until_date=int(until_date.timestamp()) if until_date else None,
-            )
             return TEXTS["punishments"]["mute"].format(duration_str)
-
         elif action == "ban":
-            await bot.ban_chat_member(
-                chat_id,
-                user_id,
-                until_date=int(until_date.timestamp()) if until_date else None,
-            )
             return TEXTS["punishments"]["ban"].format(duration_str)
-
         else:
-            await bot.ban_chat_member(chat_id, user_id)
-            await bot.unban_chat_member(chat_id, user_id)
             return TEXTS["punishments"]["kick"]
 
     except Exception as e:
@@ -376,12 +446,11 @@ async def punish_user(msg: Message, action: str, duration: str, violation: str):
 
     if action == "warn":
         settings = await get_warn_settings(msg.chat.id)
-        current_warns = await get_warns_count(msg.chat.id, user_id)
-
-        await add_warn(msg.chat.id, user_id)
-        new_warns_count = current_warns + 1
+        _, limit_reached = await register_warn(
+            msg.chat.id, user_id, settings["warns_count"], settings["decay"]
+        )
 
-        if new_warns_count >= settings["warns_count"]:
+        if limit_reached:
             punishment = await apply_punishment(
                 bot=msg.bot,
                 chat_id=msg.chat.id,
@@ -389,75 +458,37 @@ async def punish_user(msg: Message, action: str, duration: str, violation: str):
                 action=settings["action"],
                 duration=settings["duration_action"],
             )
-            mention = f"<a href='tg://user?id={user_id}'>{html.escape(msg.from_user.first_name)}</a>"
-
-            try:
-                await msg.answer(
-                    TEXTS["warnings"]["max_reached"].format(mention, punishment),
-                    parse_mode="HTML",
-                    reply_markup=await get_moderation_action_kb(
-                        user_id, settings["action"]
-                    ),
-                )
-            except Exception as e:
-                print(f"Error sending max warns message: {str(e)}")
-
-            await reset_warns(msg.chat.id, user_id)
-            return
-
-        try:
-            await msg.answer(
-                messages[action],
-                parse_mode="HTML",
-                reply_markup=await get_moderation_action_kb(user_id, action),
+            _notify(
+                msg,
+                user_id,
+                "max_warns",
+                TEXTS["warnings"]["max_reached"].format(mention, punishment),
+                await get_moderation_action_kb(user_id, settings["action"]),
             )
-        except Exception as e:
-            print(f"Error sending regular warn message: {str(e)}")
-        return
+            return
 
-    elif action == "mute":
-        permissions = ChatPermissions(
-            can_send_messages=False,
-            can_send_photos=False,
-            can_send_videos=False,
-            can_send_voice_notes=False,
-            can_send_video_notes=False,
-            can_send_media_messages=False,
-            can_send_polls=False,
-            can_send_other_messages=False,
-            can_add_web_page_previews=False,
-            can_change_info=False,
-            can_invite_users=False,
-            can_pin_messages=False,
+        _notify(
+            msg,
+            user_id,
+            action,
+            messages[action],
+            await get_moderation_action_kb(user_id, action),
         )
-        try:
-            await msg.chat.restrict(
-                user_id, permissions=permissions, until_date=until_date
-            )
-        except Exception as e:
-            print(f"Error muting user: {str(e)}")
-
-    elif action == "kick":
-        try:
-            await msg.chat.ban(user_id)
-            await msg.chat.unban(user_id)
-        except Exception as e:
-            print(f"Error kicking user: {str(e)}")
+        return
 
-    elif action == "ban":
-        try:
-            await msg.chat.ban(user_id, until_date=until_date)
-        except Exception as e:
-            print(f"Error banning user: {str(e)}")
+    if action not in messages:
+        return
 
-    try:
-        await msg.answer(
-            messages[action],
-            parse_mode="HTML",
-            reply_markup=await get_moderation_action_kb(user_id, action),
-        )
-    except Exception as e:
-        print(f"Error sending punishment message: {str(e)}")
+    # Сами вызовы Bot API уходят в очередь действий: обработчик не ждёт
+    # лимитов Telegram, а повторный мут того же пользователя не дублируется.
+    enqueue_punishment(msg.bot, msg.chat.id, user_id, action, until_date)
+    _notify(
+        msg,
+        user_id,
+        action,
+        messages[action],
+        await get_moderation_action_kb(user_id, action),
+    )
 
     punished_key = f"punished:{msg.chat.id}:{user_id}"
     try:
@@ -474,7 +505,9 @@ async def is_user_restricted(bot: Bot, chat_id: int, user_id: int) -> bool:
         return False
 
 
-async def restrict_user(bot: Bot, chat_id: int, user_id: int):
+async def restrict_user(
+    bot: Bot, chat_id: int, user_id: int, until_date: Optional[int] = None
+):
     try:
         await bot.restrict_chat_member(
             chat_id=chat_id,
@@ -485,6 +518,7 @@ async def restrict_user(bot: Bot, chat_id: int, user_id: int):
                 can_send_other_messages=False,
                 can_add_web_page_previews=False,
             ),
+            until_date=until_date,
         )
         return True
     except Exception as e:
@@ -492,6 +526,16 @@ async def restrict_user(bot: Bot, chat_id: int, user_id: int):
         return False
 
 
+async def kick_user(bot: Bot, chat_id: int, user_id: int):
+    try:
+        await bot.ban_chat_member(chat_id, user_id)
+        await bot.unban_chat_member(chat_id, user_id)
+        return True
+    except Exception as e:
+        print(f"Error kicking user: {e}")
+        return False
+
+
 async def unrestrict_user(bot: Bot, chat_id: int, user_id: int):
     try:
         await bot.restrict_chat_member(
@@ -510,6 +554,38 @@ async def unrestrict_user(bot: Bot, chat_id: int, user_id: int):
         return False
 
 
+async def _bounded_gather(calls) -> list:
+    semaphore = asyncio.Semaphore(config.JOIN_CONCURRENCY)
+
+    async def run(call):
+        async with semaphore:
+            return await call
+
+    return await asyncio.gather(*(run(call) for call in calls))
+
+
+async def restrict_users(bot: Bot, chat_id: int, user_ids: List[int]) -> List[int]:
+    """Ограничивает пользователей параллельно, возвращает успешно ограниченных."""
+    results = await _bounded_gather(
+        restrict_user(bot, chat_id, user_id) for user_id in user_ids
+    )
+    return [user_id for user_id, ok in zip(user_ids, results) if ok]
+
+
+async def unrestrict_users(bot: Bot, chat_id: int, user_ids: List[int]) -> None:
+    await _bounded_gather(
+        unrestrict_user(bot, chat_id, user_id) for user_id in user_ids
+    )
+
+
+async def filter_restricted(bot: Bot, chat_id: int, user_ids: List[int]) -> List[int]:
+    """Оставляет только тех, кто ещё не ограничен в чате."""
+    results = await _bounded_gather(
+        is_user_restricted(bot, chat_id, user_id) for user_id in user_ids
+    )
+    return [user_id for user_id, restricted in zip(user_ids, results) if not restricted]
+
+
 async def get_captcha_keyboard(user_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -522,64 +598,79 @@ async def get_captcha_keyboard(user_id: int) -> InlineKeyboardMarkup:
     )
 
 
+async def get_members_captcha_keyboard(
+    members: Sequence[User],
+) -> InlineKeyboardMarkup:
+    if len(members) == 1:
+        return await get_captcha_keyboard(members[0].id)
+
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=f"Я не робот 🤖 — {member.first_name}",
+                    callback_data=f"cunmute:{member.id}",
+                )
+            ]
+            for member in members
+        ]
+    )
+
+
 async def handle_welcome_message(message: Message):
     settings = await get_meeting_settings(message.chat.id)
     if not settings["enable"]:
         return
 
-    for new_member in message.new_chat_members:
-        if new_member.is_bot:
-            continue
+    members = [member for member in message.new_chat_members if not member.is_bot]
+    if not members:
+        return
+
+    try:
+        histories = await get_meeting_histories(
+            message.chat.id, [member.id for member in members]
+        )
+        if not settings["always_send"]:
+            members = [member for member in members if member.id not in histories]
+            if not members:
+                return
+
+        if settings["delete_last_message"]:
+            previous = [
+                histories[member.id].message_id
+                for member in members
+                if member.id in histories and histories[member.id].message_id
+            ]
+            if previous:
+                message_deleter.schedule(message.bot, message.chat.id, previous)
 
-        try:
-            history = await get_user_meeting_history(message.chat.id, new_member.id)
+        formatted_text = await format_members_text(settings["text"], message, members)
 
-            if not settings["always_send"] and history is not None:
-                continue
+        kwargs = {
+            "text": formatted_text,
+            "reply_markup": await format_keyboard(settings["buttons"]),
+            "parse_mode": "HTML",
+        }
 
-            if settings["delete_last_message"] and history and history.message_id:
-                try:
-                    await message.bot.delete_message(
-                        chat_id=message.chat.id, message_id=history.message_id
-                    )
-                except Exception as e:
-                    print(f"Error deleting previous welcome message: {e}")
-
-            formatted_text = await format_text(
-                template=settings["text"],
-                message=message,
-                target_user_id=new_member.id,
-                target_first_name=new_member.first_name,
-            )
+        welcome_message = None
 
-            kwargs = {
-                "text": formatted_text,
-                "reply_markup": await format_keyboard(settings["buttons"]),
-                "parse_mode": "HTML",
-            }
-
-            welcome_message = None
-
-            if settings["media_link"]:
-                try:
-                    kwargs["link_preview_options"] = LinkPreviewOptions(
-                        url=settings["media_link"], show_above_text=True
-                    )
-                    welcome_message = await message.answer(**kwargs)
-                except (TelegramBadRequest, ValueError) as e:
-                    print(f"Error sending message with media link: {e}")
-                    kwargs.pop("link_preview_options", None)
-
-            if not welcome_message:
+        if settings["media_link"]:
+            try:
+                kwargs["link_preview_options"] = LinkPreviewOptions(
+                    url=settings["media_link"], show_above_text=True
+                )
                 welcome_message = await message.answer(**kwargs)
+            except (TelegramBadRequest, ValueError) as e:
+                print(f"Error sending message with media link: {e}")
+                kwargs.pop("link_preview_options", None)
 
-            if history:
-                await update_meeting_message(
-                    message.chat.id, new_member.id, welcome_message.message_id
-                )
-            else:
-                await create_meeting_history(
-                    message.chat.id, new_member.id, welcome_message.message_id
-                )
-        except Exception as e:
-            print(f"Error handling welcome message: {e}")
+        if not welcome_message:
+            welcome_message = await message.answer(**kwargs)
+
+        await upsert_meeting_histories(
+            message.chat.id,
+            [member.id for member in members],
+            welcome_message.message_id,
+        )
+    except Exception as e:
+        print(f"Error handling welcome message: {e}")
@@ -12,6 +12,7 @@ from keyboards.moderationKeyboards import (
     edit_message_text_kb,
     report_kb,
 )
+from utils.adminRights import restricting_admins
 from utils.states import EditForm, ModStates
 from utils.texts import BUTTONS_MESSAGE, REPORT_MESSAGE
 
@@ -58,12 +59,7 @@ TEXTS = {
 
 
 async def get_chat_administrators(message, chat_id):
-    admins = await message.bot.get_chat_administrators(chat_id)
-    return [
-        admin.user.id
-        for admin in admins
-        if (getattr(admin, "can_restrict_members", False) or admin.status == "creator")
-    ]
+    return await restricting_admins(message.bot, chat_id)
 
 
 @report_router.callback_query(F.data.startswith("reports:"))
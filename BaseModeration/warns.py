@@ -17,14 +17,15 @@ from BaseModeration.BaseModerationHelpers import (
 )
 from database.utils import get_user_by_id_or_username
 from database.warns import (
-    add_warn,
     get_warn_settings,
     get_warns_count,
+    register_warn,
     remove_warn,
     reset_warns,
     save_warn_settings,
 )
 from keyboards.moderationKeyboards import (
+    WARN_DECAY_OPTIONS,
     back_to_warns,
     edit_message_kb,
     edit_message_text_kb,
@@ -43,7 +44,8 @@ TEXTS = {
         "некорректное поведение в группе, прежде чем наказывать их.\n\n"
         "В этом меню вы можете установить:\n"
         "• наказание для пользователей, превысивших допустимое число предупреждений\n"
-        "• допустимое число предупреждений"
+        "• допустимое число предупреждений\n"
+        "• через сколько предупреждение сгорает (♾ — никогда)"
     ),
     "time_input": (
         "⏱ <b>Установка длительности наказания</b>\n\n"
@@ -78,6 +80,7 @@ TEXTS = {
         "saved": "✅ Успешно сохранено!",
         "action_set": "\n\n<b>✅ Установлено {}</b>",
         "warns_set": "\n\n<b>✅ Установлено {} предупреждений</b>",
+        "decay_set": "\n\n<b>✅ Срок жизни предупреждений: {}</b>",
         "warn_decreased": "✅ Количество предупреждений уменьшено для {}",
         "unwarn": "✅ Предупреждения сброшены для {}",
     },
@@ -154,6 +157,18 @@ async def warn_callback(callback: CallbackQuery, state: FSMContext) -> None:
                 parse_mode="HTML"
             )
 
+        case "decay":
+            decay = int(data[2])
+            await save_warn_settings(chat_id, decay=decay)
+
+            await callback.message.edit_text(
+                text=TEXTS["main"] + TEXTS["success"]["decay_set"].format(
+                    WARN_DECAY_OPTIONS.get(decay, decay)
+                ),
+                reply_markup=await warns_kb(chat_id),
+                parse_mode="HTML"
+            )
+
         case "duration":
             await state.update_data(chat_id=chat_id)
             await callback.message.edit_text(
@@ -339,9 +354,11 @@ async def warn(msg: Message):
         if hasattr(target_user, "full_name")
         else target_user.first_name
     )
-    warns_count = await add_warn(msg.chat.id, target_user_id)
+    warns_count, limit_reached = await register_warn(
+        msg.chat.id, target_user_id, settings["warns_count"], settings["decay"]
+    )
 
-    if warns_count >= settings["warns_count"]:
+    if limit_reached:
         punishment = await apply_punishment(
             bot=msg.bot,
             chat_id=msg.chat.id,
@@ -366,7 +383,6 @@ async def warn(msg: Message):
                 target_user_id, settings["action"]
             ),
         )
-        await reset_warns(msg.chat.id, target_user_id)
     else:
         warn_text = await format_text(
             template=settings["text"],
@@ -44,3 +44,56 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         raise
     finally:
         await session.close()
+
+# Фильтр NSFW: процессы с моделью и размер очереди изображений на проверку.
+NSFW_WORKERS = 2
+NSFW_MAX_PENDING = 64
+NSFW_BATCH_SIZE = 16
+NSFW_BATCH_LATENCY_MS = 50
+# Сколько секунд картинка ждёт места в полной очереди; после этого она
+# пропускается без проверки.
+NSFW_QUEUE_TIMEOUT = 30
+# Как часто печатать глубину очереди NSFW и заполнение пачек, в секундах.
+NSFW_METRICS_INTERVAL = 300
+# Кэш вердиктов NSFW по file_unique_id и перцептивному хешу, в секундах.
+NSFW_VERDICT_TTL = 7 * 86400
+# Фоновое обновление списков администраторов: период проверки в секундах,
+# число одновременных обновлений и запрашивать ли списки у Bot API.
+ADMINS_REFRESH_INTERVAL = 60
+ADMINS_REFRESH_CONCURRENCY = 5
+ADMINS_REFRESH_FROM_API = False
+# Режим рейда: столько вступлений за окно включают карантин чата, который
+# держится, пока вступления не стихнут. Действие — "mute" или "kick".
+RAID_JOIN_THRESHOLD = 20
+RAID_WINDOW = 60
+RAID_LOCKDOWN = 300
+RAID_ACTION = "mute"
+RAID_CONCURRENCY = 10
+# Сколько вызовов Bot API одновременно делать при пакетной обработке вступлений.
+JOIN_CONCURRENCY = 10
+# Капча: сколько секунд даётся на прохождение и что делать с не прошедшими
+# ("kick" — исключить, "mute" — оставить ограниченным).
+CAPTCHA_TIMEOUT = 300
+CAPTCHA_TIMEOUT_ACTION = "kick"
+CAPTCHA_POLL_INTERVAL = 5
+CAPTCHA_POLL_BATCH = 100
+# Варны хранятся почасовыми корзинами; фоновая чистка удаляет устаревшие
+# пачками раз в интервал (в секундах).
+WARN_BUCKET_SECONDS = 3600
+WARN_PRUNE_INTERVAL = 3600
+WARN_PRUNE_BATCH = 1000
+# Очередь действий модерации (муты, баны, ответы): вызовов Bot API
+# в секунду всего и на чат, размер всплеска на чат, пределы очереди и повторы
+# сетевых ошибок с экспоненциальной задержкой от ACTION_RETRY_BASE секунд.
+ACTION_GLOBAL_RATE = 25
+ACTION_CHAT_RATE = 1
+ACTION_CHAT_BURST = 5
+ACTION_QUEUE_MAX_PENDING = 10000
+ACTION_QUEUE_CHAT_MAX = 200
+ACTION_MAX_RETRIES = 5
+ACTION_RETRY_BASE = 1.0
+ACTION_MAX_BUCKETS = 10000
+# Удаление сообщений идёт отдельной очередью со своим лимитом на чат; общий
+# лимит ACTION_GLOBAL_RATE у очередей один.
+DELETE_CHAT_RATE = 5
+DELETE_CHAT_BURST = 20
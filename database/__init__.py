@@ -1,6 +1,17 @@
 from .blockChannels import get_block_channels_settings, save_block_channels_settings
 from .blockItems import add_item_to_block, get_items_from_block, remove_item_from_block
-from .models import Block, Chat, ChatSettings, Moderation, Report, Session, User
+from .models import (
+    AppliedMigration,
+    Block,
+    BlockedItem,
+    Chat,
+    ChatConfig,
+    ChatSettings,
+    Moderation,
+    Report,
+    Session,
+    User,
+)
 from .moderation import get_moderation_settings, save_moderation_settings
 from .reports import get_report_settings, save_report_settings
 from .utils import (
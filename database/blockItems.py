@@ -1,44 +1,141 @@
-from sqlalchemy import select
+from typing import Dict
 
-from config import get_session
-from database.models import Block
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import get_session, redis_client
+from database.models import BlockedItem
+
+# Заблокированные стикеры, наборы и гифки чата хранятся в Redis-сетах
+# block:{chat_id}:{kind}. Пустая строка — служебный элемент: сет загружен
+# из БД, даже если в нём больше ничего нет.
+BLOCK_KINDS = ("stickers", "gifs", "set_stickers")
+BLOCK_CACHE_TTL = 86400
+_LOADED = ""
+
+# Добавляет элементы только в уже загруженный сет, иначе при следующей
+# проверке сет будет честно собран из БД.
+SADD_IF_LOADED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('SADD', KEYS[1], unpack(ARGV))
+end
+return 0
+"""
+
+sadd_if_loaded_script = redis_client.register_script(SADD_IF_LOADED_SCRIPT)
+
+
+def _block_key(chat_id: int, kind: str) -> str:
+    return f"block:{chat_id}:{kind}"
 
 
 async def add_item_to_block(chat_id: int, to_block: str, item: str):
     async with get_session() as session:
-        result = await session.execute(select(Block).where(Block.chat_id == chat_id))
-        block = result.scalar_one_or_none()
+        await session.execute(
+            pg_insert(BlockedItem)
+            .values(chat_id=chat_id, kind=to_block, item=item)
+            .on_conflict_do_nothing(index_elements=["chat_id", "kind", "item"])
+        )
+        await session.commit()
 
-        if block:
-            current_list = getattr(block, to_block, [])
-            if isinstance(current_list, list) and item not in current_list:
-                new_list = current_list + [item]
-                setattr(block, to_block, new_list)
-        else:
-            block = Block(chat_id=chat_id, **{to_block: [item]})
-            session.add(block)
+    await sadd_if_loaded_script(keys=[_block_key(chat_id, to_block)], args=[item])
 
 
 async def get_items_from_block(chat_id: int, from_block: str) -> list:
     async with get_session() as session:
-        result = await session.execute(select(Block).where(Block.chat_id == chat_id))
-        block = result.scalar_one_or_none()
-
-        if block:
-            return getattr(block, from_block, [])
-        else:
-            return []
+        result = await session.execute(
+            select(BlockedItem.item).where(
+                BlockedItem.chat_id == chat_id, BlockedItem.kind == from_block
+            )
+        )
+        return list(result.scalars().all())
 
 
 async def remove_item_from_block(chat_id: int, from_block: str, item: str):
     async with get_session() as session:
-        result = await session.execute(select(Block).where(Block.chat_id == chat_id))
-        block = result.scalar_one_or_none()
-
-        if block:
-            current_list = getattr(block, from_block, [])
-            if isinstance(current_list, list) and item in current_list:
-                new_list = current_list.copy()
-                new_list.remove(item)
-                setattr(block, from_block, new_list)
-                await session.commit()
+        await session.execute(
+            delete(BlockedItem).where(
+                BlockedItem.chat_id == chat_id,
+                BlockedItem.kind == from_block,
+                BlockedItem.item == item,
+            )
+        )
+        await session.commit()
+
+    await redis_client.srem(_block_key(chat_id, from_block), item)
+
+
+async def load_block_sets(chat_id: int) -> None:
+    async with get_session() as session:
+        result = await session.execute(
+            select(BlockedItem.kind, BlockedItem.item).where(
+                BlockedItem.chat_id == chat_id, BlockedItem.kind.in_(BLOCK_KINDS)
+            )
+        )
+        rows = result.all()
+
+    items = {kind: [] for kind in BLOCK_KINDS}
+    for kind, item in rows:
+        items[kind].append(item)
+
+    async with redis_client.pipeline() as pipe:
+        for kind, kind_items in items.items():
+            key = _block_key(chat_id, kind)
+            pipe.delete(key)
+            pipe.sadd(key, _LOADED, *kind_items)
+            pipe.expire(key, BLOCK_CACHE_TTL)
+        await pipe.execute()
+
+
+async def is_blocked(chat_id: int, items: Dict[str, str]) -> bool:
+    """Проверяет, заблокирован ли хотя бы один из элементов {kind: item}."""
+    items = {kind: item for kind, item in items.items() if item}
+    if not items:
+        return False
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for kind, item in items.items():
+            pipe.exists(_block_key(chat_id, kind))
+            pipe.sismember(_block_key(chat_id, kind), item)
+        replies = await pipe.execute()
+
+    loaded = replies[0::2]
+    if all(loaded):
+        return any(replies[1::2])
+
+    await load_block_sets(chat_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for kind, item in items.items():
+            pipe.sismember(_block_key(chat_id, kind), item)
+        return any(await pipe.execute())
+
+
+async def migrate_block_items():
+    # Переносим старые JSON-списки из blocks в blocked_items и очищаем их,
+    # чтобы повторный запуск ничего не делал.
+    async with get_session() as session:
+        for kind in BLOCK_KINDS:
+            await session.execute(
+                text(
+                    f"""
+                    INSERT INTO blocked_items (chat_id, kind, item)
+                    SELECT chat_id, :kind, json_array_elements_text({kind}::json)
+                    FROM blocks
+                    WHERE json_array_length({kind}::json) > 0
+                    ON CONFLICT (chat_id, kind, item) DO NOTHING
+                    """
+                ),
+                {"kind": kind},
+            )
+        await session.execute(
+            text(
+                """
+                UPDATE blocks
+                SET stickers = '[]', gifs = '[]', set_stickers = '[]'
+                WHERE json_array_length(stickers::json) > 0
+                   OR json_array_length(gifs::json) > 0
+                   OR json_array_length(set_stickers::json) > 0
+                """
+            )
+        )
+        await session.commit()
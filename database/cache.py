@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from config import redis_client
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+INVALIDATION_MAX_BACKOFF = 30
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Локальные кэши процесса, ключ в них всегда chat_id. Секция — это набор
+# настроек, при сохранении которого запись чата нужно сбросить.
+_section_caches: dict[str, list[TTLCache]] = {}
+
+
+def register_cache(cache: TTLCache, *sections: str) -> TTLCache:
+    for section in sections:
+        _section_caches.setdefault(section, []).append(cache)
+    return cache
+
+
+def invalidate_local(chat_id: int | str, section: str) -> None:
+    for cache in _section_caches.get(section, ()):
+        cache.pop(int(chat_id))
+
+
+def clear_local() -> None:
+    for caches in _section_caches.values():
+        for cache in caches:
+            cache.clear()
+
+
+async def publish_invalidation(chat_id: int | str, section: str) -> None:
+    invalidate_local(chat_id, section)
+    try:
+        await redis_client.publish(
+            INVALIDATION_CHANNEL, json.dumps([int(chat_id), section])
+        )
+    except Exception as e:
+        print(f"Error publishing cache invalidation: {e}")
+
+
+async def listen_invalidations() -> None:
+    delay = 1
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Пока подписки не было, сообщения могли потеряться.
+            clear_local()
+            delay = 1
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    chat_id, section = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                invalidate_local(chat_id, section)
+        except Exception as e:
+            # Любая ошибка, а не только обрыв соединения, иначе слушатель
+            # умрёт молча и кэши перестанут сбрасываться.
+            print(f"Invalidation listener failed, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, INVALIDATION_MAX_BACKOFF)
+        finally:
+            with contextlib.suppress(Exception):
+                await pubsub.aclose()
@@ -1,30 +1,11 @@
 from typing import Optional
 
-from sqlalchemy.future import select
-
-from config import get_session
-from database.models import Captcha
+from database.chatConfig import get_config_section, save_config_section
 
 
 async def get_captcha_settings(chat_id: int):
-    async with get_session() as session:
-        settings = await session.scalar(select(Captcha).filter_by(chat_id=int(chat_id)))
-        if settings:
-            return {"enable": settings.enable}
-        return {"enable": False}
+    return await get_config_section(chat_id, "captcha")
 
 
 async def save_captcha_settings(chat_id: int, enable: Optional[bool] = None):
-    async with get_session() as session:
-        settings = await session.scalar(select(Captcha).filter_by(chat_id=chat_id))
-
-        if settings:
-            if enable is not None:
-                settings.enable = enable
-        else:
-            settings = Captcha(
-                chat_id=chat_id, enable=enable if enable is not None else False
-            )
-            session.add(settings)
-
-        await session.commit()
+    await save_config_section(chat_id, "captcha", enable=enable)
@@ -0,0 +1,310 @@
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import get_session, redis_client
+from database.models import (
+    AntiFlood,
+    AntiSpamAll,
+    AntiSpamForward,
+    AntiSpamQuotes,
+    AntiSpamTLink,
+    Captcha,
+    ChatConfig,
+    ChatSettings,
+    ForbiddenWords,
+    Meeting,
+    Moderation,
+    NsfwFilter,
+    Report,
+    Rules,
+    Warns,
+)
+from database.utils import mark_migration_applied, migration_applied
+from utils.texts import default_moderation_settings
+
+CHAT_CONFIG_TTL = 600
+ENTITY_TYPES = ("users", "bots", "channels", "chats")
+
+# Все настройки чата лежат одной строкой chat_config: JSONB, где ключ — секция,
+# значение — её поля. Для антиспама по типам и команд модерации секция
+# составная: "forward:users", "moderation:mute".
+SECTION_DEFAULTS: Dict[str, dict] = {
+    "antiflood": {
+        "enable": True,
+        "messages": 5,
+        "time": 10,
+        "action": "mute",
+        "delete_message": True,
+        "duration_action": "60s",
+        "journal": True,
+    },
+    "nsfw": {
+        "enable": False,
+        "percent": 80,
+        "journal": True,
+        "action": "mute",
+        "duration_action": "3600",
+        "delete_message": True,
+        "text": "Обнаружен небезопасный контент!",
+        "buttons": [],
+    },
+    "tlink": {
+        "enable": True,
+        "action": "mute",
+        "delete_message": True,
+        "duration_action": "3600",
+        "username": True,
+        "bot": True,
+        "exceptions": [],
+    },
+    "all": {
+        "enable": False,
+        "action": "mute",
+        "duration_actions": "3600",
+        "delete_message": True,
+        "exceptions": [],
+    },
+    "warns": {
+        "enable": True,
+        "text": "%%__mention__%% [%%__user_id__%%] предупрежден (%%__warn_count__%%).",
+        "action": "mute",
+        "duration_action": 1800,
+        "warns_count": 3,
+        # Через сколько секунд варн перестаёт учитываться; 0 — никогда. По
+        # умолчанию варны, как и раньше, не сгорают: затухание включает чат.
+        "decay": 0,
+    },
+    "captcha": {"enable": False},
+    "meeting": {
+        "enable": True,
+        "text": "Приветствуем в нашем чате!",
+        "buttons": {},
+        "media_link": None,
+        "always_send": False,
+        "delete_last_message": True,
+    },
+    "rules": {
+        "enable": False,
+        "text": "Правила:",
+        "buttons": {},
+        "permissions": "members",
+    },
+    "reports": {
+        "enable_reports": True,
+        "delete_reported_messages": False,
+        "report_text_template": "Репорт отправлен!",
+        "buttons": [],
+    },
+    "block_channels": {
+        "enable": False,
+        "text": "Обнаружен канал! Блокирую..",
+        "buttons": {},
+    },
+    "forbidden_words": {
+        "enable": False,
+        "action": "mute",
+        "duration_action": "3600",
+        "delete_message": True,
+    },
+}
+
+for _entity_type in ENTITY_TYPES:
+    for _kind in ("forward", "quotes"):
+        SECTION_DEFAULTS[f"{_kind}:{_entity_type}"] = {
+            "enable": False,
+            "action": "mute",
+            "duration_actions": "3600",
+            "delete_message": True,
+            "exceptions": [],
+        }
+
+for _command_type, _values in default_moderation_settings.items():
+    SECTION_DEFAULTS[f"moderation:{_command_type}"] = dict(_values)
+
+
+def _cache_key(chat_id: int) -> str:
+    return f"chat_config:{chat_id}"
+
+
+def _is_valid(value, default) -> bool:
+    if default is None:
+        return True
+    if isinstance(default, bool):
+        return isinstance(value, bool)
+    if isinstance(default, (int, str)):
+        # Длительности исторически хранились и строкой, и числом.
+        return isinstance(value, (int, str)) and not isinstance(value, bool)
+    return isinstance(value, (list, dict))
+
+
+def validate_section(section: str, data: Optional[dict]) -> dict:
+    """Поля секции поверх значений по умолчанию; чужие и битые поля отбрасываются."""
+    defaults = SECTION_DEFAULTS[section]
+    data = data if isinstance(data, dict) else {}
+
+    result = {}
+    for key, default in defaults.items():
+        value = data.get(key, default)
+        result[key] = value if _is_valid(value, default) else default
+    return result
+
+
+def validate_config(raw: Optional[dict]) -> dict:
+    raw = raw or {}
+    return {
+        section: validate_section(section, raw.get(section))
+        for section in SECTION_DEFAULTS
+    }
+
+
+async def get_chat_config(chat_id: int | str) -> dict:
+    chat_id = int(chat_id)
+
+    cached_data = await redis_client.get(_cache_key(chat_id))
+    if cached_data:
+        return json.loads(cached_data)
+
+    async with get_session() as session:
+        raw = await session.scalar(
+            select(ChatConfig.config).where(ChatConfig.chat_id == chat_id)
+        )
+
+    result = validate_config(raw)
+    await redis_client.setex(_cache_key(chat_id), CHAT_CONFIG_TTL, json.dumps(result))
+    return result
+
+
+async def get_config_section(chat_id: int | str, section: str) -> dict:
+    config = await get_chat_config(chat_id)
+    return config[section]
+
+
+async def save_config_section(chat_id: int | str, section: str, **values) -> dict:
+    """Обновляет переданные поля секции; None означает «не менять»."""
+    if section not in SECTION_DEFAULTS:
+        raise ValueError(f"Unknown chat config section: {section}")
+
+    chat_id = int(chat_id)
+    values = {key: value for key, value in values.items() if value is not None}
+
+    stmt = pg_insert(ChatConfig).values(
+        chat_id=chat_id, config={section: values}, updated_at=datetime.utcnow()
+    )
+    # config || {section: старая секция || новые поля} — остальные секции
+    # не трогаем, а параллельные правки разных полей не затирают друг друга.
+    stored = ChatConfig.__table__.c.config
+    merged = func.coalesce(stored[section], cast("{}", JSONB)).op("||")(
+        stmt.excluded.config[section]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["chat_id"],
+        set_={
+            "config": stored.op("||")(
+                func.jsonb_build_object(cast(section, Text), merged)
+            ),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(ChatConfig.config)
+
+    async with get_session() as session:
+        raw = await session.scalar(stmt)
+        await session.commit()
+
+    result = validate_config(raw)
+    await redis_client.setex(_cache_key(chat_id), CHAT_CONFIG_TTL, json.dumps(result))
+    return result[section]
+
+
+async def preload_chat_config():
+    async with get_session() as session:
+        result = await session.execute(select(ChatConfig.chat_id, ChatConfig.config))
+        rows = result.all()
+
+    if not rows:
+        return
+
+    async with redis_client.pipeline() as pipe:
+        for chat_id, raw in rows:
+            pipe.setex(
+                _cache_key(chat_id), CHAT_CONFIG_TTL, json.dumps(validate_config(raw))
+            )
+        await pipe.execute()
+
+
+# Старые таблицы настроек: модель, имя секции по строке и переименованные поля.
+LEGACY_TABLES = (
+    (AntiFlood, lambda row: "antiflood", {}),
+    (NsfwFilter, lambda row: "nsfw", {}),
+    (AntiSpamTLink, lambda row: "tlink", {}),
+    (AntiSpamForward, lambda row: f"forward:{row.entity_type}", {}),
+    (AntiSpamQuotes, lambda row: f"quotes:{row.entity_type}", {}),
+    (AntiSpamAll, lambda row: "all", {}),
+    (Warns, lambda row: "warns", {}),
+    (Captcha, lambda row: "captcha", {}),
+    (Meeting, lambda row: "meeting", {}),
+    (Rules, lambda row: "rules", {}),
+    (Report, lambda row: "reports", {"enable_reports": "work"}),
+    (ChatSettings, lambda row: "block_channels", {}),
+    (Moderation, lambda row: f"moderation:{row.command_type}", {}),
+    (ForbiddenWords, lambda row: "forbidden_words", {}),
+)
+
+MIGRATION_BATCH = 1000
+MIGRATION_NAME = "chat_config"
+
+
+def _legacy_section(row, section: str, renames: dict) -> dict:
+    values = {}
+    for key in SECTION_DEFAULTS[section]:
+        # Полей, появившихся позже старых таблиц (например, warns.decay), в
+        # строке нет — для них остаётся значение по умолчанию.
+        value = getattr(row, renames.get(key, key), None)
+        if value is not None:
+            values[key] = value
+    return values
+
+
+async def migrate_chat_config():
+    """Переносит настройки из старых таблиц в chat_config.
+
+    Выполняется один раз: после переноса в applied_migrations остаётся
+    отметка, и следующие старты старые таблицы не читают. Уже сохранённые
+    в chat_config секции не перезаписываются.
+    """
+    configs: Dict[int, dict] = {}
+
+    async with get_session() as session:
+        if await migration_applied(session, MIGRATION_NAME):
+            return
+
+        for model, section_of, renames in LEGACY_TABLES:
+            result = await session.execute(select(model))
+            for row in result.scalars().all():
+                section = section_of(row)
+                if section not in SECTION_DEFAULTS:
+                    continue
+                configs.setdefault(row.chat_id, {})[section] = _legacy_section(
+                    row, section, renames
+                )
+
+        items = list(configs.items())
+        for start in range(0, len(items), MIGRATION_BATCH):
+            stmt = pg_insert(ChatConfig).values(
+                [
+                    {"chat_id": chat_id, "config": config}
+                    for chat_id, config in items[start : start + MIGRATION_BATCH]
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["chat_id"],
+                set_={"config": stmt.excluded.config.op("||")(ChatConfig.config)},
+            )
+            await session.execute(stmt)
+
+        await mark_migration_applied(session, MIGRATION_NAME)
+        await session.commit()
@@ -0,0 +1,82 @@
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import get_session
+from database.cache import publish_invalidation
+from database.chatConfig import get_config_section, save_config_section
+from database.models import BlockedItem
+
+# Сами слова лежат в общей таблице blocked_items с kind = "words".
+WORDS_KIND = "words"
+
+
+async def get_forbidden_words_settings(chat_id: int):
+    return await get_config_section(chat_id, "forbidden_words")
+
+
+async def save_forbidden_words_settings(
+    chat_id: int,
+    enable: Optional[bool] = None,
+    action: Optional[str] = None,
+    duration_action: Optional[str] = None,
+    delete_message: Optional[bool] = None,
+):
+    await save_config_section(
+        chat_id,
+        "forbidden_words",
+        enable=enable,
+        action=action,
+        duration_action=duration_action,
+        delete_message=delete_message,
+    )
+    await publish_invalidation(int(chat_id), "words")
+
+
+async def get_forbidden_words(chat_id: int) -> List[str]:
+    async with get_session() as session:
+        result = await session.execute(
+            select(BlockedItem.item)
+            .where(BlockedItem.chat_id == int(chat_id), BlockedItem.kind == WORDS_KIND)
+            .order_by(BlockedItem.id)
+        )
+        return list(result.scalars().all())
+
+
+async def add_forbidden_words(chat_id: int, words: Iterable[str]):
+    chat_id = int(chat_id)
+    words = list(dict.fromkeys(words))
+    if not words:
+        return
+
+    async with get_session() as session:
+        await session.execute(
+            pg_insert(BlockedItem)
+            .values(
+                [
+                    {"chat_id": chat_id, "kind": WORDS_KIND, "item": word}
+                    for word in words
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["chat_id", "kind", "item"])
+        )
+        await session.commit()
+
+    await publish_invalidation(chat_id, "words")
+
+
+async def remove_forbidden_words(chat_id: int, words: Optional[Iterable[str]] = None):
+    """Удаляет перечисленные слова, а без списка — все слова чата."""
+    chat_id = int(chat_id)
+    stmt = delete(BlockedItem).where(
+        BlockedItem.chat_id == chat_id, BlockedItem.kind == WORDS_KIND
+    )
+    if words is not None:
+        stmt = stmt.where(BlockedItem.item.in_(list(words)))
+
+    async with get_session() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+    await publish_invalidation(chat_id, "words")
@@ -1,32 +1,16 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from config import get_session
-from database.models import Meeting, MeetingHistory
+from database.chatConfig import get_config_section, save_config_section
+from database.models import MeetingHistory
 
 
 async def get_meeting_settings(chat_id: int) -> dict:
-    async with get_session() as session:
-        settings = await session.scalar(select(Meeting).filter_by(chat_id=int(chat_id)))
-        if settings:
-            return {
-                "enable": settings.enable,
-                "text": settings.text,
-                "buttons": settings.buttons if settings.buttons else {},
-                "media_link": settings.media_link,
-                "always_send": settings.always_send,
-                "delete_last_message": settings.delete_last_message,
-            }
-        return {
-            "enable": True,
-            "text": "Приветствуем в нашем чате!",
-            "buttons": {},
-            "media_link": None,
-            "always_send": False,
-            "delete_last_message": True,
-        }
+    return await get_config_section(chat_id, "meeting")
 
 
 async def save_meeting_settings(
@@ -38,37 +22,16 @@ async def save_meeting_settings(
     always_send: Optional[bool] = None,
     delete_last_message: Optional[bool] = None,
 ) -> None:
-    async with get_session() as session:
-        settings = await session.scalar(select(Meeting).filter_by(chat_id=chat_id))
-
-        if settings:
-            if enable is not None:
-                settings.enable = enable
-            if text is not None:
-                settings.text = text
-            if buttons is not None:
-                settings.buttons = buttons
-            if media_link is not None:
-                settings.media_link = media_link
-            if always_send is not None:
-                settings.always_send = always_send
-            if delete_last_message is not None:
-                settings.delete_last_message = delete_last_message
-        else:
-            settings = Meeting(
-                chat_id=chat_id,
-                enable=enable if enable is not None else False,
-                text=text if text is not None else "Приветствуем в нашем чате!",
-                buttons=buttons if buttons is not None else {},
-                media_link=media_link,
-                always_send=always_send if always_send is not None else False,
-                delete_last_message=(
-                    delete_last_message if delete_last_message is not None else True
-                ),
-            )
-            session.add(settings)
-
-        await session.commit()
+    await save_config_section(
+        chat_id,
+        "meeting",
+        enable=enable,
+        text=text,
+        buttons=buttons,
+        media_link=media_link,
+        always_send=always_send,
+        delete_last_message=delete_last_message,
+    )
 
 
 async def get_user_meeting_history(chat_id: int, user_id: int) -> MeetingHistory | None:
@@ -105,3 +68,53 @@ async def create_meeting_history(
         session.add(history)
         await session.commit()
         return history
+
+
+async def get_meeting_histories(
+    chat_id: int, user_ids: Iterable[int]
+) -> Dict[int, MeetingHistory]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+
+    async with get_session() as session:
+        result = await session.execute(
+            select(MeetingHistory).where(
+                MeetingHistory.chat_id == chat_id,
+                MeetingHistory.user_id.in_(user_ids),
+            )
+        )
+        return {history.user_id: history for history in result.scalars().all()}
+
+
+async def upsert_meeting_histories(
+    chat_id: int, user_ids: Iterable[int], message_id: Optional[int]
+) -> None:
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return
+
+    now = datetime.utcnow()
+    stmt = pg_insert(MeetingHistory).values(
+        [
+            {
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "message_id": message_id,
+                "first_joined_at": now,
+                "last_welcomed_at": now,
+            }
+            for user_id in user_ids
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["chat_id", "user_id"],
+        set_={
+            "message_id": stmt.excluded.message_id,
+            "last_welcomed_at": stmt.excluded.last_welcomed_at,
+        },
+    )
+
+    async with get_session() as session:
+        await session.execute(stmt)
+        await session.commit()
@@ -11,6 +11,7 @@ from sqlalchemy import (
     String,
     Text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 
 from config import engine
@@ -65,6 +66,7 @@ class Chat(Base):
     work = Column(Boolean, nullable=False, default=False)
     net = Column(BigInteger, nullable=True)
     admins = Column(JSON, nullable=False, default=[])
+    # Больше не ведётся: права администраторов хранит utils.adminRights.
     all_admins = Column(JSON, nullable=False, default=[])
 
     def __repr__(self):
@@ -128,6 +130,25 @@ class Block(Base):
         )
 
 
+class BlockedItem(Base):
+    __tablename__ = "blocked_items"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    chat_id = Column(BigInteger, nullable=False)
+    kind = Column(String, nullable=False)
+    item = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("idx_blocked_chat_kind_item", chat_id, kind, item, unique=True),
+    )
+
+    def __repr__(self):
+        return (
+            f"<BlockedItem(id={self.id}, chat_id={self.chat_id}, "
+            f"kind='{self.kind}', item='{self.item}')>"
+        )
+
+
 class ChatSettings(Base):
     __tablename__ = "block_channels"
 
@@ -165,15 +186,25 @@ class Warns(Base):
         )
 
 
-class UserWarn(Base):
-    __tablename__ = "user_warns"
+class UserWarnBucket(Base):
+    __tablename__ = "user_warn_buckets"
 
-    user_id = Column(BigInteger, primary_key=True)
-    chat_id = Column(BigInteger, primary_key=True)
-    warns = Column(Integer, default=0)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    chat_id = Column(BigInteger, nullable=False)
+    user_id = Column(BigInteger, nullable=False)
+    bucket = Column(BigInteger, nullable=False)
+    warns = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("idx_warn_bucket_chat_user", chat_id, user_id, bucket, unique=True),
+        Index("idx_warn_bucket_bucket", bucket),
+    )
 
     def __repr__(self):
-        return f"<Warn(user_id={self.user_id}, chat_id={self.chat_id}, warns={self.warns})>"
+        return (
+            f"<UserWarnBucket(chat_id={self.chat_id}, user_id={self.user_id}, "
+            f"bucket={self.bucket}, warns={self.warns})>"
+        )
 
 
 class AntiFlood(Base):
@@ -354,3 +385,46 @@ class MeetingHistory(Base):
             f"first_joined_at='{self.first_joined_at}', "
             f"last_welcomed_at='{self.last_welcomed_at}')>"
         )
+
+
+class ForbiddenWords(Base):
+    __tablename__ = "forbidden_words"
+
+    chat_id = Column(BigInteger, primary_key=True, unique=True)
+    enable = Column(Boolean, nullable=False, default=False)
+    action = Column(String, nullable=False, default="mute")
+    duration_action = Column(String, nullable=False, default="3600")
+    delete_message = Column(Boolean, nullable=False, default=True)
+
+    def __repr__(self):
+        return (
+            f"<ForbiddenWords(chat_id={self.chat_id}, enable={self.enable}, "
+            f"action='{self.action}', duration_action='{self.duration_action}', "
+            f"delete_message={self.delete_message})>"
+        )
+
+
+class ChatConfig(Base):
+    __tablename__ = "chat_config"
+
+    chat_id = Column(BigInteger, primary_key=True)
+    config = Column(JSONB, nullable=False, default=dict)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    def __repr__(self):
+        return (
+            f"<ChatConfig(chat_id={self.chat_id}, "
+            f"sections={sorted(self.config or {})})>"
+        )
+
+
+class AppliedMigration(Base):
+    __tablename__ = "applied_migrations"
+
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AppliedMigration(name='{self.name}', applied_at='{self.applied_at}')>"
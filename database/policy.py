@@ -0,0 +1,68 @@
+import asyncio
+
+from aiogram import Bot
+
+from database.cache import TTLCache, register_cache
+from database.chatConfig import ENTITY_TYPES, get_chat_config
+from utils.adminRights import admin_ids
+
+policy_cache = register_cache(
+    TTLCache(maxsize=5000, ttl=60),
+    "admin_rights",
+    "antiflood",
+    "tlink",
+    "forward",
+    "quotes",
+    "all",
+)
+
+
+class ChatPolicy:
+    def __init__(
+        self,
+        chat_id: int,
+        admins: list,
+        antiflood: dict,
+        tlink: dict,
+        all_links: dict,
+        forward: dict,
+        quotes: dict,
+    ):
+        self.chat_id = chat_id
+        self.admins = frozenset(admins)
+        self.antiflood = antiflood
+        self.tlink = tlink
+        self.all_links = all_links
+        self.forward = forward
+        self.quotes = quotes
+        # Скомпилированные правила антиспама, собираются при первой проверке.
+        self.antispam_rules = None
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.admins
+
+    def __repr__(self):
+        return f"<ChatPolicy(chat_id={self.chat_id}, admins={len(self.admins)})>"
+
+
+async def get_chat_policy(bot: Bot, chat_id: int | str) -> ChatPolicy:
+    chat_id = int(chat_id)
+    policy = policy_cache.get(chat_id)
+    if policy is not None:
+        return policy
+
+    admins, config = await asyncio.gather(
+        admin_ids(bot, chat_id), get_chat_config(chat_id)
+    )
+
+    policy = ChatPolicy(
+        chat_id=chat_id,
+        admins=admins,
+        antiflood=config["antiflood"],
+        tlink=config["tlink"],
+        all_links=config["all"],
+        forward={t: config[f"forward:{t}"] for t in ENTITY_TYPES},
+        quotes={t: config[f"quotes:{t}"] for t in ENTITY_TYPES},
+    )
+    policy_cache.set(chat_id, policy)
+    return policy
@@ -1,27 +1,10 @@
 from typing import Optional
 
-from sqlalchemy.future import select
-
-from config import get_session
-from database.models import Report
+from database.chatConfig import get_config_section, save_config_section
 
 
 async def get_report_settings(chat_id: int):
-    async with get_session() as session:
-        report = await session.scalar(select(Report).filter_by(chat_id=chat_id))
-        if report:
-            return {
-                "enable_reports": report.work,
-                "delete_reported_messages": report.delete_reported_messages,
-                "report_text_template": report.report_text_template,
-                "buttons": report.buttons if report.buttons else [],
-            }
-        return {
-            "enable_reports": True,
-            "delete_reported_messages": False,
-            "report_text_template": "Репорт отправлен!",
-            "buttons": [],
-        }
+    return await get_config_section(chat_id, "reports")
 
 
 async def save_report_settings(
@@ -31,32 +14,11 @@ async def save_report_settings(
     report_text_template: Optional[str] = None,
     buttons: Optional[list] = None,
 ):
-    async with get_session() as session:
-        report = await session.scalar(select(Report).filter_by(chat_id=chat_id))
-
-        if report:
-            if enable_reports is not None:
-                report.work = enable_reports
-            if delete_reported_messages is not None:
-                report.delete_reported_messages = delete_reported_messages
-            if report_text_template is not None:
-                report.report_text_template = report_text_template
-            if buttons is not None:
-                report.buttons = buttons
-        else:
-            report = Report(
-                chat_id=chat_id,
-                work=enable_reports if enable_reports is not None else False,
-                delete_reported_messages=(
-                    delete_reported_messages
-                    if delete_reported_messages is not None
-                    else False
-                ),
-                report_text_template=(
-                    report_text_template if report_text_template is not None else ""
-                ),
-                buttons=buttons if buttons is not None else [],
-            )
-            session.add(report)
-
-        await session.commit()
+    await save_config_section(
+        chat_id,
+        "reports",
+        enable_reports=enable_reports,
+        delete_reported_messages=delete_reported_messages,
+        report_text_template=report_text_template,
+        buttons=buttons,
+    )
@@ -1,5 +1,6 @@
 import json
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Type
 
 from sqlalchemy import cast, select
 from sqlalchemy.dialects.postgresql import JSONB
@@ -7,7 +8,46 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import get_session, redis_client
-from database.models import Chat, User
+from database.models import AppliedMigration, Chat, User
+
+
+async def upsert_partial(
+    session: AsyncSession,
+    model: Type,
+    key: dict,
+    values: dict,
+    defaults: Optional[dict] = None,
+):
+    """Частичный upsert одной командой: INSERT ... ON CONFLICT DO UPDATE RETURNING.
+
+    None в values означает «не менять»: новая строка берёт такие поля из
+    defaults, а у существующей обновляются только переданные. Возвращает
+    строку в том виде, в каком она оказалась в БД.
+    """
+    provided = {name: value for name, value in values.items() if value is not None}
+    stmt = pg_insert(model).values(**key, **{**(defaults or {}), **provided})
+
+    # Пустой SET недопустим, а DO NOTHING не вернёт существующую строку.
+    update_columns = list(provided) or list(key)[:1]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={name: stmt.excluded[name] for name in update_columns},
+    ).returning(model)
+
+    return await session.scalar(stmt)
+
+
+async def migration_applied(session: AsyncSession, name: str) -> bool:
+    return await session.get(AppliedMigration, name) is not None
+
+
+async def mark_migration_applied(session: AsyncSession, name: str) -> None:
+    # Два экземпляра бота могли выполнить перенос одновременно.
+    await session.execute(
+        pg_insert(AppliedMigration)
+        .values(name=name, applied_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
 
 
 async def add_or_update_user(
@@ -55,33 +95,25 @@ async def add_or_update_chat(
     members_count: int = None,
     work: bool = None,
     admins: list = None,
-    all_admins: list = None,
 ):
     async with get_session() as session:
-        chat = await session.get(Chat, chat_id)
-
-        if chat:
-            if title is not None:
-                chat.title = title
-            if members_count is not None:
-                chat.members_count = members_count
-            if work is not None:
-                chat.work = work
-            if admins is not None:
-                chat.admins = admins
-            if all_admins is not None:
-                chat.all_admins = all_admins
-        else:
-            chat = Chat(
-                chat_id=chat_id,
-                title=title or "Untitled Chat",
-                members_count=members_count or 0,
-                work=work if work is not None else False,
-                admins=admins or [],
-                all_admins=all_admins or [],
-            )
-            session.add(chat)
-
+        await upsert_partial(
+            session,
+            Chat,
+            key={"chat_id": chat_id},
+            values={
+                "title": title,
+                "members_count": members_count,
+                "work": work,
+                "admins": admins,
+            },
+            defaults={
+                "title": "Untitled Chat",
+                "members_count": 0,
+                "work": False,
+                "admins": [],
+            },
+        )
         await session.commit()
 
         if admins is not None:
@@ -110,43 +142,7 @@ async def get_chat(chat_id: int):
         return chat
 
 
-async def get_chat_admins(chat_id: int) -> List[int]:
-    cache_key = f"chat:{chat_id}:all_admins"
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        return json.loads(cached_data)
-
+async def get_chat_ids() -> List[int]:
     async with get_session() as session:
-        result = await session.execute(select(Chat).filter_by(chat_id=chat_id))
-        chat = result.scalars().first()
-
-        if chat and chat.all_admins:
-            admin_ids = (
-                json.loads(chat.all_admins)
-                if isinstance(chat.all_admins, str)
-                else chat.all_admins
-            )
-        else:
-            admin_ids = []
-
-    await redis_client.setex(cache_key, 600, json.dumps(admin_ids))
-    return admin_ids
-
-
-async def preload_admins():
-    async with get_session() as session:
-        result = await session.execute(select(Chat.chat_id).distinct())
-        chat_ids = [row[0] for row in result.fetchall()]
-
-        if not chat_ids:
-            return
-
-        count = 0
-        async with redis_client.pipeline() as pipe:
-            for chat_id in chat_ids:
-                admin_ids = await get_chat_admins(chat_id)
-                cache_key = f"chat:{chat_id}:admins"
-                pipe.setex(cache_key, 600, json.dumps(admin_ids))
-                count += 1
-
-            await pipe.execute()
+        result = await session.execute(select(Chat.chat_id))
+        return list(result.scalars().all())
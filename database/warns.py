@@ -1,29 +1,23 @@
-from typing import Optional
+import asyncio
+import time
+from typing import Optional, Tuple
 
+from sqlalchemy import delete, func, text, update
 from sqlalchemy.future import select
 
+import config
 from config import get_session
-from database.models import UserWarn, Warns
+from database.chatConfig import (
+    SECTION_DEFAULTS,
+    get_config_section,
+    save_config_section,
+)
+from database.models import UserWarnBucket
+from database.utils import mark_migration_applied, migration_applied
 
 
 async def get_warn_settings(chat_id: int):
-    async with get_session() as session:
-        warn = await session.scalar(select(Warns).filter_by(chat_id=int(chat_id)))
-        if warn:
-            return {
-                "enable": warn.enable,
-                "text": warn.text,
-                "action": warn.action,
-                "duration_action": warn.duration_action,
-                "warns_count": warn.warns_count,
-            }
-        return {
-            "enable": True,
-            "text": "%%__mention__%% [%%__user_id__%%] предупрежден (%%__warn_count__%%).",
-            "action": "mute",
-            "duration_action": 1800,
-            "warns_count": 3,
-        }
+    return await get_config_section(chat_id, "warns")
 
 
 async def save_warn_settings(
@@ -33,108 +27,243 @@ async def save_warn_settings(
     action: Optional[str] = None,
     duration_action: Optional[str] = None,
     warns_count: Optional[int] = None,
+    decay: Optional[int] = None,
 ):
-    async with get_session() as session:
-        warn = await session.scalar(select(Warns).filter_by(chat_id=int(chat_id)))
-
-        if warn:
-            if enable is not None:
-                warn.enable = enable
-            if text is not None:
-                warn.text = text
-            if action is not None:
-                warn.action = action
-            if duration_action is not None:
-                warn.duration_action = duration_action
-            if warns_count is not None:
-                warn.warns_count = warns_count
-        else:
-            warn = Warns(
-                chat_id=int(chat_id),
-                enable=enable if enable is not None else True,
-                text=(
-                    text
-                    if text is not None
-                    else "%%__mention__%% [%%__user_id__%%] предупрежден (%%__warn_count__%%)."
-                ),
-                action=action if action is not None else "mute",
-                duration_action=(
-                    duration_action if duration_action is not None else 1800
-                ),
-                warns_count=warns_count if warns_count is not None else 3,
-            )
-            session.add(warn)
+    await save_config_section(
+        chat_id,
+        "warns",
+        enable=enable,
+        text=text,
+        action=action,
+        duration_action=duration_action,
+        warns_count=warns_count,
+        decay=decay,
+    )
 
-        await session.commit()
 
+# Варны лежат в user_warn_buckets: одна строка на пользователя и час, в
+# котором он их получил. В счёт идут корзины, попавшие в окно затухания чата.
 
-async def get_user_warns(chat_id: int, user_id: int) -> Optional[UserWarn]:
-    async with get_session() as session:
-        warn_entry = await session.scalar(
-            select(UserWarn).where(
-                UserWarn.chat_id == chat_id, UserWarn.user_id == user_id
-            )
+
+def _bucket(timestamp: Optional[float] = None) -> int:
+    if timestamp is None:
+        timestamp = time.time()
+    return int(timestamp // config.WARN_BUCKET_SECONDS)
+
+
+def _window_start(decay) -> int:
+    decay = int(decay or 0)
+    if decay <= 0:
+        return 0
+    return _bucket(time.time() - decay)
+
+
+def _user_filter(chat_id: int, user_id: int) -> tuple:
+    return (UserWarnBucket.chat_id == chat_id, UserWarnBucket.user_id == user_id)
+
+
+async def _count_warns(session, chat_id: int, user_id: int, decay) -> int:
+    return await session.scalar(
+        select(func.coalesce(func.sum(UserWarnBucket.warns), 0)).where(
+            *_user_filter(chat_id, user_id),
+            UserWarnBucket.bucket >= _window_start(decay),
         )
-        if warn_entry:
-            async with get_session() as new_session:
-                warn_entry = await new_session.get(UserWarn, warn_entry.id)
-        return warn_entry
+    )
+
+
+# Один запрос на варн: блокирует корзины пользователя в окне, добавляет варн
+# в текущую и считает сумму. На лимите текущая корзина обнуляется, а прочие
+# удаляются тем же запросом. FOR UPDATE выстраивает одновременные варны одного
+# пользователя в очередь, так что наказание получает ровно одно нарушение.
+REGISTER_WARN_SQL = text(
+    """
+    WITH locked AS (
+        SELECT bucket, warns
+        FROM user_warn_buckets
+        WHERE chat_id = :chat_id AND user_id = :user_id
+            AND bucket >= :window_start
+        FOR UPDATE
+    ),
+    other AS (
+        SELECT COALESCE(SUM(warns), 0) AS warns
+        FROM locked
+        WHERE bucket <> :bucket
+    ),
+    bumped AS (
+        INSERT INTO user_warn_buckets (chat_id, user_id, bucket, warns)
+        SELECT :chat_id, :user_id, :bucket,
+            CASE WHEN other.warns + 1 >= :max_warns THEN 0 ELSE 1 END
+        FROM other
+        ON CONFLICT (chat_id, user_id, bucket) DO UPDATE SET warns = CASE
+            WHEN (SELECT warns FROM other) + user_warn_buckets.warns + 1
+                >= :max_warns
+            THEN 0
+            ELSE user_warn_buckets.warns + 1
+        END
+        RETURNING warns
+    ),
+    cleared AS (
+        DELETE FROM user_warn_buckets
+        WHERE chat_id = :chat_id AND user_id = :user_id AND bucket <> :bucket
+            AND EXISTS (SELECT 1 FROM bumped WHERE warns = 0)
+    )
+    SELECT
+        CASE WHEN bumped.warns = 0 THEN :max_warns
+            ELSE other.warns + bumped.warns
+        END,
+        bumped.warns = 0
+    FROM bumped, other
+    """
+)
+
 
+async def register_warn(
+    chat_id: int, user_id: int, max_warns: int, decay: int = 0
+) -> Tuple[int, bool]:
+    """Добавляет варн и сообщает, достигнут ли лимит в окне затухания.
 
-async def add_warn(chat_id: int, user_id: int) -> int:
+    На лимите варны пользователя обнуляются, а вместо их числа возвращается
+    max_warns. Возвращает (число варнов, достигнут ли лимит).
+    """
     async with get_session() as session:
-        warn_entry = await session.scalar(
-            select(UserWarn).where(
-                UserWarn.chat_id == chat_id, UserWarn.user_id == user_id
-            )
+        result = await session.execute(
+            REGISTER_WARN_SQL,
+            {
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "bucket": _bucket(),
+                "window_start": _window_start(decay),
+                "max_warns": max_warns,
+            },
         )
+        warns, limit_reached = result.one()
+        await session.commit()
+
+    return warns, limit_reached
 
-        if warn_entry:
-            warn_entry.warns += 1
-        else:
-            warn_entry = UserWarn(user_id=user_id, chat_id=chat_id, warns=1)
-            session.add(warn_entry)
 
+async def reset_warns(chat_id: int, user_id: int) -> bool:
+    async with get_session() as session:
+        result = await session.execute(
+            delete(UserWarnBucket)
+            .where(*_user_filter(chat_id, user_id))
+            .returning(UserWarnBucket.id)
+        )
+        reset = result.first() is not None
         await session.commit()
-        return warn_entry.warns
+        return reset
 
 
-async def reset_warns(chat_id: int, user_id: int) -> bool:
+async def remove_warn(chat_id: int, user_id: int) -> int:
+    settings = await get_warn_settings(chat_id)
+    latest = (
+        select(UserWarnBucket.id)
+        .where(
+            *_user_filter(chat_id, user_id),
+            UserWarnBucket.bucket >= _window_start(settings["decay"]),
+            UserWarnBucket.warns > 0,
+        )
+        .order_by(UserWarnBucket.bucket.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
     async with get_session() as session:
-        warn_entry = await session.scalar(
-            select(UserWarn).where(
-                UserWarn.chat_id == chat_id, UserWarn.user_id == user_id
-            )
+        await session.execute(
+            update(UserWarnBucket)
+            .where(UserWarnBucket.id == latest)
+            .values(warns=UserWarnBucket.warns - 1)
         )
+        warns = await _count_warns(session, chat_id, user_id, settings["decay"])
+        await session.commit()
+        return warns
 
-        if warn_entry:
-            warn_entry.warns = 0
-            await session.commit()
-            return True
 
-        return False
+async def get_warns_count(chat_id: int, user_id: int) -> int:
+    settings = await get_warn_settings(chat_id)
 
+    async with get_session() as session:
+        return await _count_warns(session, chat_id, user_id, settings["decay"])
 
-async def remove_warn(chat_id: int, user_id: int) -> int:
+
+# Окно затухания берётся из chat_config каждого чата, без строки — по умолчанию.
+PRUNE_WARNS_SQL = text(
+    """
+    WITH expired AS (
+        SELECT b.id
+        FROM user_warn_buckets b
+        LEFT JOIN chat_config c ON c.chat_id = b.chat_id
+        CROSS JOIN LATERAL (
+            SELECT COALESCE(
+                CASE
+                    WHEN jsonb_typeof(c.config #> '{warns,decay}') = 'number'
+                    THEN (c.config #>> '{warns,decay}')::bigint
+                END,
+                :default_decay
+            ) AS decay
+        ) w
+        WHERE w.decay > 0 AND b.bucket < (:now - w.decay) / :bucket_seconds
+        LIMIT :batch
+    )
+    DELETE FROM user_warn_buckets
+    WHERE id IN (SELECT id FROM expired)
+    """
+)
+
+
+async def prune_expired_warns() -> int:
     async with get_session() as session:
-        warn_entry = await session.scalar(
-            select(UserWarn).where(
-                UserWarn.chat_id == chat_id, UserWarn.user_id == user_id
-            )
+        result = await session.execute(
+            PRUNE_WARNS_SQL,
+            {
+                "default_decay": SECTION_DEFAULTS["warns"]["decay"],
+                "now": int(time.time()),
+                "bucket_seconds": config.WARN_BUCKET_SECONDS,
+                "batch": config.WARN_PRUNE_BATCH,
+            },
         )
+        await session.commit()
+        return result.rowcount
 
-        if warn_entry and warn_entry.warns > 0:
-            warn_entry.warns -= 1
-            await session.commit()
-            return warn_entry.warns
-        return 0
 
+async def warns_prune_loop() -> None:
+    while True:
+        try:
+            # Полная пачка — значит, устаревшие ещё есть: чистим без паузы.
+            if await prune_expired_warns() >= config.WARN_PRUNE_BATCH:
+                continue
+        except Exception as e:
+            print(f"Error pruning expired warns: {e}")
+        await asyncio.sleep(config.WARN_PRUNE_INTERVAL)
 
-async def get_warns_count(chat_id: int, user_id: int) -> int:
+
+MIGRATION_NAME = "user_warn_buckets"
+
+
+async def migrate_user_warns():
+    """Переносит счётчики из старой user_warns в текущую корзину и удаляет её.
+
+    Выполняется один раз: после переноса остаётся отметка в applied_migrations.
+    """
     async with get_session() as session:
-        warn_entry = await session.scalar(
-            select(UserWarn).where(
-                UserWarn.chat_id == chat_id, UserWarn.user_id == user_id
+        if await migration_applied(session, MIGRATION_NAME):
+            return
+
+        # На новых установках старой таблицы нет.
+        if await session.scalar(text("SELECT to_regclass('user_warns')")):
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO user_warn_buckets (chat_id, user_id, bucket, warns)
+                    SELECT chat_id, user_id, :bucket, warns
+                    FROM user_warns
+                    WHERE warns > 0
+                    ON CONFLICT (chat_id, user_id, bucket) DO NOTHING
+                    """
+                ),
+                {"bucket": _bucket()},
             )
-        )
-        return warn_entry.warns if warn_entry else 0
+            await session.execute(text("DROP TABLE user_warns"))
+
+        await mark_migration_applied(session, MIGRATION_NAME)
+        await session.commit()
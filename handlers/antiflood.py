@@ -1,3 +1,5 @@
+import time
+
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
@@ -10,10 +12,39 @@ from keyboards.antifloodKeyboards import (
     back_to_antiflood,
     numbers_keyboard,
 )
+from utils.messageDeleter import message_deleter
 from utils.states import AntiFlood, ModStates
 
 antiflood_router = Router()
 
+# Скользящее окно на sorted set: score — время сообщения в мс, member — его id.
+# KEYS[1] — окно пользователя, KEYS[2] — флаг «уже наказывается».
+# Возвращает id сообщений для удаления, если лимит превышен, иначе пустой список.
+ANTIFLOOD_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return {}
+end
+
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+
+if redis.call('ZCARD', KEYS[1]) <= limit then
+    return {}
+end
+
+local flooded = redis.call('ZRANGE', KEYS[1], 0, -1)
+redis.call('DEL', KEYS[1])
+redis.call('SET', KEYS[2], '1', 'PX', window)
+return flooded
+"""
+
+antiflood_script = redis_client.register_script(ANTIFLOOD_SCRIPT)
+
 TEXTS = {
     "main": (
         "🛡 Антифлуд — система защиты чата от спама и частых сообщений. "
@@ -182,49 +213,31 @@ async def warn_duration(msg: Message, state: FSMContext):
     await state.clear()
 
 
-async def check_antiflood(msg: Message, chat_id: int, user_id: int) -> None:
+async def check_antiflood(
+    msg: Message, chat_id: int, user_id: int, settings: dict
+) -> None:
     try:
-        settings = await get_antiflood_settings(chat_id)
         if not settings["enable"]:
             return
 
-        messages_limit = settings["messages"]
-        time_limit = settings["time"]
-        action = settings["action"]
-
-        redis_key = f"antiflood:{chat_id}:{user_id}"
-        punished_key = f"punished:{chat_id}:{user_id}"
-        flood_messages_key = f"flood_msgs:{chat_id}:{user_id}"
-
-        is_punished = await redis_client.exists(punished_key)
-        if is_punished:
+        window_ms = settings["time"] * 1000
+        flooded_messages = await antiflood_script(
+            keys=[f"flood:{chat_id}:{user_id}", f"punished:{chat_id}:{user_id}"],
+            args=[
+                int(time.time() * 1000),
+                window_ms,
+                settings["messages"],
+                msg.message_id,
+            ],
+        )
+        if not flooded_messages:
             return
 
-        async with redis_client.pipeline() as pipe:
-            pipe.incr(redis_key)
-            pipe.expire(redis_key, time_limit)
-            pipe.rpush(flood_messages_key, msg.message_id)
-            pipe.expire(flood_messages_key, time_limit)
-            result = await pipe.execute()
-
-            current_count = result[0]
-
-            if current_count > messages_limit:
-                await redis_client.setex(punished_key, time_limit, "1")
+        message_deleter.schedule(msg.bot, chat_id, flooded_messages)
 
-                flooded_messages = await redis_client.lrange(flood_messages_key, 0, -1)
-                for msg_id in flooded_messages:
-                    try:
-                        await msg.bot.delete_message(chat_id, int(msg_id))
-                    except Exception:
-                        pass
-
-                if action:
-                    await punish_user(
-                        msg, action, settings["duration_action"], "флуд в чате."
-                    )
-
-                await redis_client.delete(redis_key)
-                await redis_client.delete(flood_messages_key)
+        if settings["action"]:
+            await punish_user(
+                msg, settings["action"], settings["duration_action"], "флуд в чате."
+            )
     except Exception:
         pass
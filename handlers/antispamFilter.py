@@ -0,0 +1,208 @@
+import re
+from typing import Callable, List, Optional
+
+from aiogram.types import Message, MessageOriginChannel, MessageOriginUser
+
+from BaseModeration.BaseModerationHelpers import punish_user
+from database.policy import ENTITY_TYPES, ChatPolicy
+from utils.linkExceptions import LinkExceptions
+from utils.messageDeleter import message_deleter
+
+TLINK_PATTERN = re.compile(
+    r"^(?:https?:\/\/)?(?:[\w-]+\.)?t(?:elegram)?\.me\/", re.IGNORECASE
+)
+USERNAME_PATTERN = re.compile(r"^@\w{4,}$")
+BOT_USERNAME_PATTERN = re.compile(r"^@\w{4,}bot$")
+
+
+def _chat_entity_type(chat_type: str) -> Optional[str]:
+    if chat_type in ["group", "supergroup"]:
+        return "chats"
+    if chat_type == "channel":
+        return "channels"
+    return None
+
+
+def _forward_type(msg: Message) -> Optional[str]:
+    if isinstance(msg.forward_origin, MessageOriginUser):
+        return "bots" if msg.forward_origin.sender_user.is_bot else "users"
+    if isinstance(msg.forward_origin, MessageOriginChannel):
+        return "channels"
+    if msg.forward_from:
+        return "bots" if msg.forward_from.is_bot else "users"
+    if msg.forward_from_chat:
+        return _chat_entity_type(msg.forward_from_chat.type)
+    return None
+
+
+def _quote_type(msg: Message) -> Optional[str]:
+    if not msg.external_reply:
+        return None
+
+    chat = msg.external_reply.chat
+    origin = msg.external_reply.origin
+    if chat and _chat_entity_type(chat.type):
+        return _chat_entity_type(chat.type)
+    if isinstance(origin, MessageOriginUser):
+        return "bots" if origin.sender_user.is_bot else "users"
+    if isinstance(origin, MessageOriginChannel):
+        return "channels"
+    return None
+
+
+class MessageFeatures:
+    """Всё, что правилам антиспама нужно знать о сообщении, разобранное один раз."""
+
+    __slots__ = (
+        "forward_type",
+        "quote_type",
+        "urls",
+        "tlinks",
+        "text",
+        "is_username",
+        "is_bot_username",
+    )
+
+    def __init__(self, msg: Message):
+        self.forward_type = _forward_type(msg)
+        self.quote_type = _quote_type(msg)
+
+        self.urls = []
+        if msg.entities and msg.text:
+            self.urls = [
+                msg.text[entity.offset : entity.offset + entity.length]
+                for entity in msg.entities
+                if entity.type == "url"
+            ]
+        self.tlinks = [url for url in self.urls if TLINK_PATTERN.match(url)]
+
+        self.text = msg.text or ""
+        self.is_username = bool(USERNAME_PATTERN.match(self.text))
+        self.is_bot_username = bool(BOT_USERNAME_PATTERN.match(self.text))
+
+
+class AntispamRule:
+    __slots__ = ("settings", "duration", "exceptions", "match")
+
+    def __init__(
+        self,
+        settings: dict,
+        duration: str,
+        match: Callable[[MessageFeatures], Optional[str]],
+        exceptions: LinkExceptions,
+    ):
+        self.settings = settings
+        self.duration = duration
+        self.exceptions = exceptions
+        self.match = match
+
+
+def _tlink_match(
+    settings: dict, exceptions: LinkExceptions
+) -> Callable[[MessageFeatures], Optional[str]]:
+    check_username = settings["username"]
+    check_bot = settings["bot"]
+
+    def match(features: MessageFeatures) -> Optional[str]:
+        if any(not exceptions.allows_url(url) for url in features.tlinks):
+            return "Телеграм ссылки (t.me link)"
+        if features.tlinks or exceptions.allows_mention(features.text):
+            return None
+        if check_username and features.is_username:
+            return "Телеграм ссылки (username)"
+        if check_bot and features.is_bot_username:
+            return "Телеграм ссылки (bot username)"
+        return None
+
+    return match
+
+
+def _links_match(
+    exceptions: LinkExceptions,
+) -> Callable[[MessageFeatures], Optional[str]]:
+    def match(features: MessageFeatures) -> Optional[str]:
+        if any(not exceptions.allows_url(url) for url in features.urls):
+            return "Ссылки в сообщении"
+        return None
+
+    return match
+
+
+def compile_rules(policy: ChatPolicy) -> List[AntispamRule]:
+    """Собирает включённые настройки антиспама чата в упорядоченный список правил."""
+    rules = []
+
+    for entity_type in ENTITY_TYPES:
+        settings = policy.forward[entity_type]
+        if settings["enable"]:
+            rules.append(
+                AntispamRule(
+                    settings,
+                    settings["duration_actions"],
+                    lambda f, t=entity_type: (
+                        f"Пересылка из чата ({t})" if f.forward_type == t else None
+                    ),
+                    LinkExceptions(settings["exceptions"]),
+                )
+            )
+
+    for entity_type in ENTITY_TYPES:
+        settings = policy.quotes[entity_type]
+        if settings["enable"]:
+            rules.append(
+                AntispamRule(
+                    settings,
+                    settings["duration_actions"],
+                    lambda f, t=entity_type: (
+                        f"Цитата из чата ({t})" if f.quote_type == t else None
+                    ),
+                    LinkExceptions(settings["exceptions"]),
+                )
+            )
+
+    if policy.tlink["enable"]:
+        exceptions = LinkExceptions(policy.tlink["exceptions"])
+        rules.append(
+            AntispamRule(
+                policy.tlink,
+                policy.tlink["duration_action"],
+                _tlink_match(policy.tlink, exceptions),
+                exceptions,
+            )
+        )
+
+    if policy.all_links["enable"]:
+        exceptions = LinkExceptions(policy.all_links["exceptions"])
+        rules.append(
+            AntispamRule(
+                policy.all_links,
+                policy.all_links["duration_actions"],
+                _links_match(exceptions),
+                exceptions,
+            )
+        )
+
+    return rules
+
+
+async def check_antispam(msg: Message, policy: ChatPolicy) -> bool:
+    if policy.antispam_rules is None:
+        policy.antispam_rules = compile_rules(policy)
+    if not policy.antispam_rules:
+        return False
+
+    features = MessageFeatures(msg)
+    user_id = msg.from_user.id if msg.from_user else None
+
+    for rule in policy.antispam_rules:
+        reason = rule.match(features)
+        if reason is None or rule.exceptions.allows_user(user_id):
+            continue
+
+        if rule.settings["delete_message"]:
+            message_deleter.schedule(msg.bot, msg.chat.id, [msg.message_id])
+        if msg.from_user:
+            await punish_user(msg, rule.settings["action"], rule.duration, reason)
+        return True
+
+    return False
@@ -4,7 +4,7 @@ from aiogram.types import CallbackQuery, Message
 
 from database.blockItems import (
     add_item_to_block,
-    get_items_from_block,
+    is_blocked,
     remove_item_from_block,
 )
 from keyboards.handlersKeyboards import stickers_kb
@@ -98,23 +98,16 @@ async def unblock(msg: Message):
 
 async def block_stickers(msg: Message):
     chat_id = msg.chat.id
-    sticker_id = msg.sticker.file_id
-    sticker_set_name = msg.sticker.set_name
 
-    blocked_stickers = await get_items_from_block(chat_id, "stickers")
-    blocked_sets = await get_items_from_block(chat_id, "set_stickers")
-
-    if sticker_id in blocked_stickers or (
-        sticker_set_name and sticker_set_name in blocked_sets
+    if await is_blocked(
+        chat_id,
+        {"stickers": msg.sticker.file_id, "set_stickers": msg.sticker.set_name},
     ):
         await msg.delete()
 
 
 async def block_gifs(msg: Message):
     chat_id = msg.chat.id
-    gif_id = msg.animation.file_id
-
-    blocked_gifs = await get_items_from_block(chat_id, "gifs")
 
-    if gif_id in blocked_gifs:
+    if await is_blocked(chat_id, {"gifs": msg.animation.file_id}):
         await msg.delete()
@@ -1,24 +1,29 @@
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
+import config
 from BaseModeration.BaseModerationHelpers import (
+    filter_restricted,
     format_keyboard,
-    format_text,
-    get_captcha_keyboard,
+    format_members_text,
+    get_members_captcha_keyboard,
     handle_welcome_message,
-    is_user_restricted,
-    restrict_user,
+    restrict_users,
     unrestrict_user,
+    unrestrict_users,
 )
 from database.captcha import get_captcha_settings
 from database.meeting import (
+    get_meeting_histories,
     get_meeting_settings,
-    get_user_meeting_history,
     save_meeting_settings,
 )
 from keyboards.meetingKeyboards import meeting_kb
 from keyboards.moderationKeyboards import edit_message_kb, edit_message_text_kb
+from utils.captchaScheduler import create_challenges, solve_challenge
+from utils.messageDeleter import message_deleter
+from utils.raidMode import RAID_OFF, RAID_STARTED, lockdown_members, register_joins
 from utils.states import EditForm, ModStates
 from utils.texts import BUTTONS_MESSAGE
 
@@ -41,53 +46,80 @@ TEXTS = {
     "media_text": (
         "👉🏻 Отправьте ссылку на медиа в формате (example.com/video<b>.mp4</b>):"
     ),
+    "raid": (
+        "🚨 <b>Обнаружен рейд</b>\n\n"
+        "└ Вступлений за последние {} сек.: {}\n"
+        "└ Новые участники ограничиваются без приветствий\n"
+        "└ Режим отключится сам, когда вступления прекратятся"
+    ),
 }
 
 
+async def handle_raid_joins(message: Message) -> bool:
+    user_ids = [member.id for member in message.new_chat_members if not member.is_bot]
+    joins, raid_state = await register_joins(message.chat.id, user_ids)
+    if raid_state == RAID_OFF:
+        return False
+
+    message_deleter.schedule(message.bot, message.chat.id, [message.message_id])
+    await lockdown_members(message.bot, message.chat.id, user_ids)
+
+    if raid_state == RAID_STARTED:
+        try:
+            await message.answer(
+                text=TEXTS["raid"].format(config.RAID_WINDOW, joins),
+                parse_mode="HTML",
+            )
+        except Exception as e:
+            print(f"Error announcing raid mode: {e}")
+    return True
+
+
 @meeting_router.message(F.new_chat_members)
 async def new_chat_member(message: Message):
+    if await handle_raid_joins(message):
+        return
+
     captcha_settings = await get_captcha_settings(message.chat.id)
     meeting_settings = await get_meeting_settings(message.chat.id)
 
     if not captcha_settings["enable"]:
         return await handle_welcome_message(message)
 
-    for new_member in message.new_chat_members:
-        if new_member.is_bot:
-            continue
-
-        if await is_user_restricted(message.bot, message.chat.id, new_member.id):
-            continue
-
-        history = await get_user_meeting_history(message.chat.id, new_member.id)
-        if not meeting_settings["always_send"] and history is not None:
-            continue
+    members = {
+        member.id: member for member in message.new_chat_members if not member.is_bot
+    }
+    user_ids = await filter_restricted(message.bot, message.chat.id, list(members))
 
-        if not await restrict_user(message.bot, message.chat.id, new_member.id):
-            continue
+    if not meeting_settings["always_send"]:
+        histories = await get_meeting_histories(message.chat.id, user_ids)
+        user_ids = [user_id for user_id in user_ids if user_id not in histories]
 
-        try:
-            welcome_text = (
-                f"👋 Привет, {new_member.mention_html()}!\n"
-                f"Для доступа к чату, пожалуйста, подтвердите, что вы не робот."
-            )
+    user_ids = await restrict_users(message.bot, message.chat.id, user_ids)
+    if not user_ids:
+        return
 
-            captcha_text = await format_text(
-                template=welcome_text,
-                message=message,
-                target_user_id=new_member.id,
-                target_first_name=new_member.first_name,
-            )
+    restricted = [members[user_id] for user_id in user_ids]
+    try:
+        captcha_text = await format_members_text(
+            template=(
+                "👋 Привет, %%__mention__%%!\n"
+                "Для доступа к чату, пожалуйста, подтвердите, что вы не робот."
+            ),
+            message=message,
+            members=restricted,
+        )
 
-            await message.answer(
-                text=captcha_text,
-                reply_markup=await get_captcha_keyboard(new_member.id),
-                parse_mode="HTML",
-            )
+        captcha_message = await message.answer(
+            text=captcha_text,
+            reply_markup=await get_members_captcha_keyboard(restricted),
+            parse_mode="HTML",
+        )
+        await create_challenges(message.chat.id, user_ids, captcha_message.message_id)
 
-        except Exception as e:
-            print(f"Error sending captcha message: {e}")
-            await unrestrict_user(message.bot, message.chat.id, new_member.id)
+    except Exception as e:
+        print(f"Error sending captcha message: {e}")
+        await unrestrict_users(message.bot, message.chat.id, user_ids)
 
 
 @meeting_router.callback_query(F.data.startswith("cunmute:"))
@@ -99,8 +131,26 @@ async def handle_captcha_callback(callback: CallbackQuery):
         return
 
     try:
+        if not await solve_challenge(callback.message.chat.id, user_id):
+            await callback.answer(
+                "Время на прохождение капчи истекло.", show_alert=True
+            )
+            return
+
         if await unrestrict_user(callback.bot, callback.message.chat.id, user_id):
-            await callback.message.delete()
+            # В общей капче убираем только кнопку прошедшего проверку.
+            keyboard = callback.message.reply_markup
+            rows = [
+                row
+                for row in (keyboard.inline_keyboard if keyboard else [])
+                if all(button.callback_data != callback.data for button in row)
+            ]
+            if rows:
+                await callback.message.edit_reply_markup(
+                    reply_markup=InlineKeyboardMarkup(inline_keyboard=rows)
+                )
+            else:
+                await callback.message.delete()
 
             class CustomMessage:
                 def __init__(self, chat_id, from_user, bot):
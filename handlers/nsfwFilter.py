@@ -1,6 +1,6 @@
-import os
+import asyncio
+import io
 
-import opennsfw2 as n2
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
@@ -10,9 +10,21 @@ from BaseModeration.BaseModerationHelpers import (
     parse_seconds_time,
     punish_user,
 )
-from database.nsfwFilter import get_nsfwFilter_settings, save_nsfwFilter_settings
+from database.nsfwFilter import (
+    get_nsfw_verdict,
+    get_nsfwFilter_settings,
+    save_nsfw_verdict,
+    save_nsfwFilter_settings,
+)
 from keyboards.moderationKeyboards import edit_message_kb, edit_message_text_kb
 from keyboards.nsfwKeyboards import nsfw_back, nsfw_kb
+from utils.messageDeleter import message_deleter
+from utils.nsfwClassifier import (
+    NsfwQueueFull,
+    image_dhash,
+    nsfw_classifier,
+    pick_photo_size,
+)
 from utils.states import EditForm, Nsfw, ModStates
 from utils.texts import BUTTONS_MESSAGE
 
@@ -305,26 +317,39 @@ async def check_nsfw_photo(msg: Message, chat_id: int) -> None:
         if not nsfw_settings["enable"]:
             return
 
-        file_id = msg.photo[-1].file_id
-        file_path = f"/tmp/{file_id}.jpg"
-
-        await msg.bot.download(file_id, file_path)
-
-        try:
-            nsfw_score = n2.predict_image(file_path)
-            print(nsfw_score)
-
-            if nsfw_score * 100 >= nsfw_settings["percent"]:
-                if nsfw_settings["delete_message"]:
-                    await msg.delete()
-                await punish_user(
-                    msg,
-                    nsfw_settings["action"],
-                    nsfw_settings["duration_action"],
-                    nsfw_settings["text"],
-                )
-        finally:
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        photo = pick_photo_size(msg.photo)
+        nsfw_score = await get_nsfw_verdict(file_unique_id=photo.file_unique_id)
+
+        if nsfw_score is None:
+            buffer = io.BytesIO()
+            await msg.bot.download(photo.file_id, destination=buffer)
+            image_data = buffer.getvalue()
+
+            try:
+                image_hash = await asyncio.to_thread(image_dhash, image_data)
+            except Exception:
+                image_hash = None
+
+            nsfw_score = await get_nsfw_verdict(image_hash=image_hash)
+            if nsfw_score is None:
+                try:
+                    nsfw_score = await nsfw_classifier.classify(image_data)
+                except NsfwQueueFull as e:
+                    print(f"NSFW check skipped in chat {chat_id}: {e}")
+                    return
+
+            await save_nsfw_verdict(
+                nsfw_score, file_unique_id=photo.file_unique_id, image_hash=image_hash
+            )
+
+        if nsfw_score * 100 >= nsfw_settings["percent"]:
+            if nsfw_settings["delete_message"]:
+                message_deleter.schedule(msg.bot, chat_id, [msg.message_id])
+            await punish_user(
+                msg,
+                nsfw_settings["action"],
+                nsfw_settings["duration_action"],
+                nsfw_settings["text"],
+            )
     except Exception:
         pass
@@ -5,9 +5,9 @@ from aiogram.types import CallbackQuery, Message
 
 from BaseModeration.BaseModerationHelpers import format_keyboard
 from database.rules import get_rules_settings, save_rules_settings
-from database.utils import get_chat_admins
 from keyboards.moderationKeyboards import edit_message_kb, edit_message_text_kb
 from keyboards.rulesKeyboards import permissions_kb, rules_kb
+from utils.adminRights import admin_ids
 from utils.states import EditForm, RulesStates, ModStates
 from utils.texts import BUTTONS_MESSAGE
 
@@ -57,8 +57,7 @@ async def rules(msg: Message):
             return
 
         case "admins":
-            admin_ids = await get_chat_admins(msg.chat.id)
-            if msg.from_user.id not in admin_ids:
+            if msg.from_user.id not in await admin_ids(msg.bot, msg.chat.id):
                 return
 
         case "private":
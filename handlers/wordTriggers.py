@@ -1,9 +1,257 @@
-from aiogram import Router, F
+import html
+import re
+from typing import Optional, Tuple
+
+from aiogram import F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, Message
+
+from BaseModeration.BaseModerationHelpers import parse_seconds_time, punish_user
+from database.cache import TTLCache, register_cache
+from database.forbiddenWords import (
+    add_forbidden_words,
+    get_forbidden_words,
+    get_forbidden_words_settings,
+    remove_forbidden_words,
+    save_forbidden_words_settings,
+)
+from keyboards.wordTriggersKeyboards import back_to_forbidden_words, forbidden_words_kb
+from utils.messageDeleter import message_deleter
+from utils.states import ForbiddenWordsStates, ModStates
+from utils.wordFilter import WordMatcher
 
 word_triggers = Router()
 
+# Собранный автомат чата вместе с настройками; сбрасывается при любом
+# изменении списка слов или настроек.
+matcher_cache = register_cache(TTLCache(maxsize=5000, ttl=3600), "words")
+
+TEXTS = {
+    "main": (
+        "📝 <b>Запретные слова</b>\n\n"
+        "Сообщения, содержащие слова из списка, будут удаляться, а отправитель — "
+        "наказан. Регистр, похожие латинские буквы и невидимые символы "
+        "не помогут обойти фильтр."
+    ),
+    "status": "\n\n{} {}",
+    "add": (
+        "➕ Отправьте слова или фразы, которые нужно запретить.\n"
+        "└ Каждое с новой строки или через запятую"
+    ),
+    "remove": (
+        "➖ Отправьте слова или фразы, которые нужно убрать из списка.\n"
+        "└ Каждое с новой строки или через запятую"
+    ),
+    "list": "📄 <b>Запретные слова ({})</b>\n\n{}",
+    "empty": "📄 Список запретных слов пуст.",
+    "added": "✅ Добавлено слов: {}",
+    "removed": "✅ Удалено слов: {}",
+    "cleared": "\n\n🧹 Список слов очищен",
+    "time_input": (
+        "⏱ <b>Установка длительности наказания</b>\n\n"
+        "Отправьте сейчас длительность выбранного наказания\n"
+        "└ Минимум: 30 секунд\n"
+        "└ Максимум: 365 дней\n\n"
+        "Пример формата:\n"
+        "└ 3 m, 2 d, 12 h, 4 m, 34 s"
+    ),
+    "saved": "✅ Успешно сохранено!",
+}
+
+
+def _parse_words(text: str) -> list:
+    return [word.strip() for word in re.split(r"[\n,]", text or "") if word.strip()]
+
 
 @word_triggers.callback_query(F.data.startswith("forbidden_words:"))
-async def forbidden_words():
-    # TODO: реализовать логику запрещенных слов
-    pass
\ No newline at end of file
+async def forbidden_words(callback: CallbackQuery, state: FSMContext):
+    chat_id = int(callback.data.split(":")[1])
+    await state.set_state(ModStates.managing_chat)
+    await state.update_data(chat_id=chat_id)
+    await callback.message.edit_text(
+        text=TEXTS["main"],
+        reply_markup=await forbidden_words_kb(chat_id),
+        parse_mode="HTML",
+    )
+
+
+@word_triggers.callback_query(F.data.startswith("fw:"))
+async def forbidden_words_callback(callback: CallbackQuery, state: FSMContext):
+    data_parts = callback.data.split(":")
+    data = await state.get_data()
+    chat_id = int(data.get("chat_id"))
+    action = data_parts[1]
+
+    match action:
+        case "switch":
+            settings = await get_forbidden_words_settings(chat_id)
+            enable = not settings["enable"]
+            await save_forbidden_words_settings(chat_id, enable=enable)
+
+            status = TEXTS["status"].format(
+                "✅" if enable else "❌",
+                "Фильтр включён" if enable else "Фильтр выключен",
+            )
+            await callback.message.edit_text(
+                text=TEXTS["main"] + status,
+                reply_markup=await forbidden_words_kb(chat_id),
+                parse_mode="HTML",
+            )
+
+        case "add":
+            await callback.message.edit_text(
+                text=TEXTS["add"], reply_markup=await back_to_forbidden_words(chat_id)
+            )
+            await state.set_state(ForbiddenWordsStates.ADD)
+
+        case "remove":
+            await callback.message.edit_text(
+                text=TEXTS["remove"],
+                reply_markup=await back_to_forbidden_words(chat_id),
+            )
+            await state.set_state(ForbiddenWordsStates.REMOVE)
+
+        case "list":
+            words = await get_forbidden_words(chat_id)
+            text = (
+                TEXTS["list"].format(
+                    len(words), "\n".join(f"└ {html.escape(word)}" for word in words)
+                )
+                if words
+                else TEXTS["empty"]
+            )
+            await callback.message.edit_text(
+                text=text[:4096],
+                reply_markup=await back_to_forbidden_words(chat_id),
+                parse_mode="HTML",
+            )
+
+        case "clear":
+            await remove_forbidden_words(chat_id)
+            await callback.message.edit_text(
+                text=TEXTS["main"] + TEXTS["cleared"],
+                reply_markup=await forbidden_words_kb(chat_id),
+                parse_mode="HTML",
+            )
+
+        case "action":
+            await save_forbidden_words_settings(chat_id, action=data_parts[2])
+            await callback.message.edit_text(
+                text=TEXTS["main"],
+                reply_markup=await forbidden_words_kb(chat_id),
+                parse_mode="HTML",
+            )
+
+        case "duration":
+            await callback.message.edit_text(
+                text=TEXTS["time_input"],
+                reply_markup=await back_to_forbidden_words(chat_id),
+                parse_mode="HTML",
+            )
+            await state.set_state(ForbiddenWordsStates.DURATION)
+
+        case "delete_messages":
+            settings = await get_forbidden_words_settings(chat_id)
+            await save_forbidden_words_settings(
+                chat_id, delete_message=not settings["delete_message"]
+            )
+            await callback.message.edit_text(
+                text=TEXTS["main"],
+                reply_markup=await forbidden_words_kb(chat_id),
+                parse_mode="HTML",
+            )
+
+        case "back":
+            await state.set_state(ModStates.managing_chat)
+            await callback.message.edit_text(
+                text=TEXTS["main"],
+                reply_markup=await forbidden_words_kb(chat_id),
+                parse_mode="HTML",
+            )
+
+
+@word_triggers.message(ForbiddenWordsStates.ADD)
+async def forbidden_words_add(msg: Message, state: FSMContext):
+    data = await state.get_data()
+    chat_id = data.get("chat_id")
+
+    words = _parse_words(msg.text)
+    await add_forbidden_words(chat_id, words)
+    await msg.answer(
+        text=TEXTS["added"].format(len(words)),
+        reply_markup=await back_to_forbidden_words(chat_id),
+    )
+    await state.set_state(ModStates.managing_chat)
+
+
+@word_triggers.message(ForbiddenWordsStates.REMOVE)
+async def forbidden_words_remove(msg: Message, state: FSMContext):
+    data = await state.get_data()
+    chat_id = data.get("chat_id")
+
+    words = _parse_words(msg.text)
+    await remove_forbidden_words(chat_id, words)
+    await msg.answer(
+        text=TEXTS["removed"].format(len(words)),
+        reply_markup=await back_to_forbidden_words(chat_id),
+    )
+    await state.set_state(ModStates.managing_chat)
+
+
+@word_triggers.message(ForbiddenWordsStates.DURATION)
+async def forbidden_words_duration(msg: Message, state: FSMContext):
+    data = await state.get_data()
+    chat_id = data.get("chat_id")
+
+    format_duration = await parse_seconds_time(str(msg.text))
+    if format_duration is None:
+        await msg.answer(
+            "⚠️ Неверный формат. Используйте: 30s, 5m, 2h, 1d, 1w или 1y",
+            reply_markup=await back_to_forbidden_words(chat_id),
+        )
+        return
+
+    await save_forbidden_words_settings(chat_id, duration_action=str(format_duration))
+    await msg.answer(
+        text=TEXTS["saved"], reply_markup=await back_to_forbidden_words(chat_id)
+    )
+    await state.set_state(ModStates.managing_chat)
+
+
+async def get_word_matcher(chat_id: int) -> Tuple[dict, Optional[WordMatcher]]:
+    cached = matcher_cache.get(chat_id)
+    if cached is not None:
+        return cached
+
+    settings = await get_forbidden_words_settings(chat_id)
+    matcher = None
+    if settings["enable"]:
+        matcher = WordMatcher(await get_forbidden_words(chat_id))
+
+    matcher_cache.set(chat_id, (settings, matcher))
+    return settings, matcher
+
+
+async def check_forbidden_words(msg: Message, chat_id: int) -> bool:
+    text = msg.text or msg.caption
+    if not text:
+        return False
+
+    settings, matcher = await get_word_matcher(chat_id)
+    if matcher is None:
+        return False
+
+    word = matcher.search(text)
+    if word is None:
+        return False
+
+    if settings["delete_message"]:
+        message_deleter.schedule(msg.bot, chat_id, [msg.message_id])
+    if msg.from_user:
+        await punish_user(
+            msg,
+            settings["action"],
+            settings["duration_action"],
+            f"Запретное слово ({word})",
+        )
+    return True
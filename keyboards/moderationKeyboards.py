@@ -8,6 +8,9 @@ from database.moderation import get_moderation_settings
 from database.reports import get_report_settings
 from database.warns import get_warn_settings
 
+# Варианты срока жизни варна: секунды → подпись кнопки.
+WARN_DECAY_OPTIONS = {0: "♾", 86400: "⏳ 1 д", 7 * 86400: "⏳ 7 д", 30 * 86400: "⏳ 30 д"}
+
 
 async def get_moderation_action_kb(user_id: int, action: str):
     buttons = []
@@ -235,6 +238,16 @@ async def warns_kb(chat_id):
     )
 
     builder.row(*number_buttons)
+
+    decay_buttons = []
+    for seconds, label in WARN_DECAY_OPTIONS.items():
+        mark = " ✅" if seconds == settings["decay"] else ""
+        decay_buttons.append(
+            InlineKeyboardButton(
+                text=f"{label}{mark}", callback_data=f"warn:decay:{seconds}"
+            )
+        )
+    builder.row(*decay_buttons)
     builder.row(
         InlineKeyboardButton(text="⬅️ Назад", callback_data=f"edit:main:back:{chat_id}")
     )
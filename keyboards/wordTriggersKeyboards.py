@@ -0,0 +1,83 @@
+from aiogram.types import InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from database.forbiddenWords import get_forbidden_words_settings
+
+
+async def forbidden_words_kb(chat_id):
+    chat_id = int(chat_id)
+    settings = await get_forbidden_words_settings(chat_id)
+
+    enable_status = "✅ Вкл" if settings["enable"] else "❌ Выкл"
+    delete_status = (
+        "🗑 Удалять сообщения ✅"
+        if settings["delete_message"]
+        else "🗑 Удалять сообщения ❌"
+    )
+    action = settings["action"]
+
+    moderation_texts = {
+        "ban": "бана.",
+        "kick": "",
+        "mute": "обеззвучивания.",
+        "warn": "",
+    }
+    mute_text = (
+        f"⏳ Длительность {moderation_texts.get(action, 'наказания.')}"
+        if action not in ["kick", "warn"]
+        else None
+    )
+
+    builder = InlineKeyboardBuilder()
+
+    builder.row(InlineKeyboardButton(text=enable_status, callback_data="fw:switch"))
+    builder.row(
+        InlineKeyboardButton(text="➕ Добавить", callback_data="fw:add"),
+        InlineKeyboardButton(text="➖ Удалить", callback_data="fw:remove"),
+    )
+    builder.row(
+        InlineKeyboardButton(text="📄 Список слов", callback_data="fw:list"),
+        InlineKeyboardButton(text="🧹 Очистить", callback_data="fw:clear"),
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=f"❗ Предупреждение {'✅' if action == 'warn' else ''}",
+            callback_data="fw:action:warn",
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=f"❗ Исключить {'✅' if action == 'kick' else ''}",
+            callback_data="fw:action:kick",
+        ),
+        InlineKeyboardButton(
+            text=f"🎧 Обеззвучить {'✅' if action == 'mute' else ''}",
+            callback_data="fw:action:mute",
+        ),
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text=f"🚫 Заблокировать {'✅' if action == 'ban' else ''}",
+            callback_data="fw:action:ban",
+        )
+    )
+
+    if mute_text:
+        builder.row(InlineKeyboardButton(text=mute_text, callback_data="fw:duration"))
+
+    builder.row(
+        InlineKeyboardButton(text=delete_status, callback_data="fw:delete_messages")
+    )
+    builder.row(
+        InlineKeyboardButton(text="⬅️ Назад", callback_data=f"edit:main:back:{chat_id}")
+    )
+
+    return builder.as_markup()
+
+
+async def back_to_forbidden_words(chat_id):
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(text="🔙 Назад", callback_data=f"fw:back:{chat_id}")
+    )
+    return builder.as_markup()
@@ -13,10 +13,11 @@ from BaseModeration.muting import muting_router
 from BaseModeration.reports import report_router
 from BaseModeration.warns import warns_router
 from config import redis_client
-from database.antiflood import preload_antiflood_settings
-from database.antispam import preload_antispam_settings
+from database.blockItems import migrate_block_items
+from database.cache import listen_invalidations
+from database.chatConfig import migrate_chat_config, preload_chat_config
 from database.models import init_db
-from database.utils import preload_admins
+from database.warns import migrate_user_warns, warns_prune_loop
 from handlers.antiflood import antiflood_router
 from handlers.antispam import antispam_router
 from handlers.blockChannels import channels_router
@@ -26,15 +27,22 @@ from handlers.handlers import handlers_router
 from handlers.meeting import meeting_router
 from handlers.nsfwFilter import nsfw_router
 from handlers.rules import rules_router
+from handlers.wordTriggers import word_triggers
 from middlefilters.addUser import AddUserToDatabaseMiddleware
+from utils.actionQueue import action_queue, delete_queue
+from utils.adminRights import admins_refresh_loop
+from utils.captchaScheduler import captcha_timeout_loop
 from utils.helpers import utils_router
+from utils.messageDeleter import message_deleter
+from utils.nsfwClassifier import nsfw_classifier, nsfw_metrics_loop
 
 
 async def main():
     await init_db()
-    await preload_admins()
-    await preload_antispam_settings()
-    await preload_antiflood_settings()
+    await migrate_block_items()
+    await migrate_chat_config()
+    await migrate_user_warns()
+    await preload_chat_config()
     bot = Bot(token=config.BOT_TOKEN)
     storage = RedisStorage(redis_client)
     dp = Dispatcher(storage=storage)
@@ -54,13 +62,30 @@ async def main():
         rules_router,
         meeting_router,
         captcha_router,
+        word_triggers,
         handlers_router,
     )
-    dp.message.middleware(AddUserToDatabaseMiddleware())
+    add_user_middleware = AddUserToDatabaseMiddleware()
+    dp.message.middleware(add_user_middleware)
+    invalidation_task = asyncio.create_task(listen_invalidations())
+    admins_refresh_task = asyncio.create_task(admins_refresh_loop(bot))
+    captcha_task = asyncio.create_task(captcha_timeout_loop(bot))
+    warns_prune_task = asyncio.create_task(warns_prune_loop())
+    nsfw_metrics_task = asyncio.create_task(nsfw_metrics_loop())
     try:
         await bot.delete_webhook(drop_pending_updates=True)
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
+        invalidation_task.cancel()
+        admins_refresh_task.cancel()
+        captcha_task.cancel()
+        warns_prune_task.cancel()
+        nsfw_metrics_task.cancel()
+        await add_user_middleware.close()
+        await message_deleter.close()
+        await action_queue.close()
+        await delete_queue.close()
+        nsfw_classifier.shutdown()
         await storage.close()
         await redis_client.aclose()
         await bot.session.close()
@@ -1,10 +1,10 @@
 from typing import Union
 
-from aiogram import types
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import BaseFilter
 from aiogram.types import CallbackQuery, Message
 
+from utils.adminRights import can_restrict
+
 
 class HasPromoteRights(BaseFilter):
 
@@ -20,22 +20,4 @@ class HasPromoteRights(BaseFilter):
         else:
             return False
 
-        try:
-            admins = await event.bot.get_chat_administrators(chat_id=chat_id)
-        except TelegramBadRequest as e:
-            if "there are no administrators in the private chat" in str(e):
-                return False
-            else:
-                raise
-
-        for admin in admins:
-            if admin.user.id == user_id:
-                if (
-                    isinstance(admin, types.ChatMemberAdministrator)
-                    and admin.can_restrict_members
-                ):
-                    return True
-                if isinstance(admin, types.ChatMemberOwner):
-                    return True
-
-        return False
+        return await can_restrict(event.bot, chat_id, user_id)
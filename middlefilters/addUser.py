@@ -1,15 +1,31 @@
-from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import contextlib
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
+from aiogram.types import User as TelegramUser
+from sqlalchemy import or_
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.future import select
 
 from config import get_session
+from database.cache import TTLCache
 from database.models import User
 
 
 class AddUserToDatabaseMiddleware(BaseMiddleware):
+    def __init__(self, flush_interval: float = 0.5, batch_size: int = 500):
+        super().__init__()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # Последний записанный в БД профиль: неизменившихся пользователей
+        # в очередь не ставим вовсе.
+        self._profiles = TTLCache(maxsize=200000, ttl=86400)
+        self._pending: Dict[int, tuple] = {}
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
@@ -17,43 +33,89 @@ class AddUserToDatabaseMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         try:
-            user_id = event.from_user.id
-            username = event.from_user.username or "unknown"
-            first_name = event.from_user.first_name or "unknown"
-            last_name = event.from_user.last_name or "unknown"
-
-            async with get_session() as session:
-
-                result = await session.execute(
-                    select(User).where(User.user_id == user_id)
-                )
-                existing_user = result.scalar_one_or_none()
-
-                if not existing_user or (
-                    existing_user.username != username
-                    or existing_user.first_name != first_name
-                    or existing_user.last_name != last_name
-                ):
-                    stmt = (
-                        pg_insert(User)
-                        .values(
-                            user_id=user_id,
-                            username=username,
-                            first_name=first_name,
-                            last_name=last_name,
-                        )
-                        .on_conflict_do_update(
-                            index_elements=["user_id"],
-                            set_={
-                                "username": username,
-                                "first_name": first_name,
-                                "last_name": last_name,
-                            },
-                        )
-                    )
+            self.enqueue(event.from_user)
+        except Exception as e:
+            print(f"Error queueing user: {e}")
+        return await handler(event, data)
+
+    def enqueue(self, user: Optional[TelegramUser]) -> None:
+        if user is None:
+            return
+
+        profile = (
+            user.username or "unknown",
+            user.first_name or "unknown",
+            user.last_name or "unknown",
+        )
+        if self._profiles.get(user.id) == profile:
+            return
+
+        self._pending[user.id] = profile
+
+        if self._task is None and not self._closing:
+            self._task = asyncio.create_task(self._flush_loop())
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            self._batch_ready.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._pending:
+            user_ids = list(self._pending)[: self.batch_size]
+            batch = {user_id: self._pending.pop(user_id) for user_id in user_ids}
+
+            stmt = pg_insert(User).values(
+                [
+                    {
+                        "user_id": user_id,
+                        "username": username,
+                        "first_name": first_name,
+                        "last_name": last_name,
+                    }
+                    for user_id, (username, first_name, last_name) in batch.items()
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    "username": stmt.excluded.username,
+                    "first_name": stmt.excluded.first_name,
+                    "last_name": stmt.excluded.last_name,
+                },
+                where=or_(
+                    User.username.is_distinct_from(stmt.excluded.username),
+                    User.first_name.is_distinct_from(stmt.excluded.first_name),
+                    User.last_name.is_distinct_from(stmt.excluded.last_name),
+                ),
+            )
+
+            try:
+                async with get_session() as session:
                     await session.execute(stmt)
                     await session.commit()
+            except Exception as e:
+                print(f"Error flushing users batch: {e}")
+                # Возвращаем пачку в очередь, если за это время не пришло
+                # более свежих данных, но не даём очереди расти бесконечно.
+                if len(self._pending) < self.batch_size * 10:
+                    for user_id, profile in batch.items():
+                        self._pending.setdefault(user_id, profile)
+                return
+
+            for user_id, profile in batch.items():
+                self._profiles.set(user_id, profile)
 
-            return await handler(event, data)
-        except Exception:
-            return await handler(event, data)
+    async def close(self) -> None:
+        # Отмена посреди flush потеряла бы уже снятую из очереди пачку:
+        # будим цикл, даём ему дописать текущую и выйти, потом пишем остаток.
+        self._closing = True
+        if self._task is not None:
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        await self.flush()
@@ -0,0 +1,236 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Optional, Set
+
+from aiogram.exceptions import (
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+import config
+
+Action = Callable[[], Awaitable]
+
+
+class TokenBucket:
+    """rate токенов в секунду, не больше capacity; pause() — для retry_after."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Сколько секунд ждать, пока можно будет взять токен."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def settled(self) -> bool:
+        """Полный и без паузы — такое ведро можно выбросить и создать заново."""
+        now = time.monotonic()
+        self._refill(now)
+        return now >= self._paused_until and self._tokens >= self.capacity
+
+
+class _Job:
+    __slots__ = ("key", "action", "description", "attempts")
+
+    def __init__(self, key: Optional[Hashable], action: Action, description: str):
+        self.key = key
+        self.action = action
+        self.description = description
+        self.attempts = 0
+
+
+class ActionDispatcher:
+    """Очередь вызовов Bot API: по очереди на чат, с лимитами и повторами.
+
+    Действия одного чата выполняются строго по порядку. Каждое берёт токен
+    из ведра чата и из общего ведра; на 429 ведро чата ставится на паузу
+    на retry_after, сетевые ошибки и 5xx повторяются с экспоненциальной
+    задержкой. Действие с ключом, который уже ждёт в очереди, отбрасывается.
+    """
+
+    def __init__(
+        self,
+        global_bucket: TokenBucket,
+        chat_rate: float,
+        chat_burst: int,
+        max_pending: int,
+        chat_max_pending: int,
+        max_retries: int,
+        retry_base: float,
+        max_buckets: int,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_pending = max_pending
+        self.chat_max_pending = chat_max_pending
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.max_buckets = max_buckets
+
+        self._global = global_bucket
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._queues: Dict[int, Deque[_Job]] = {}
+        self._keys: Set[Hashable] = set()
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def enqueue(
+        self,
+        chat_id: int,
+        action: Action,
+        key: Optional[Hashable] = None,
+        description: str = "action",
+    ) -> bool:
+        """Ставит действие в очередь чата; False — дубликат или очередь полна."""
+        if key is not None and key in self._keys:
+            return False
+
+        queue = self._queues.get(chat_id)
+        if self._pending >= self.max_pending or (
+            queue is not None and len(queue) >= self.chat_max_pending
+        ):
+            print(f"Action queue is full, dropping {description} in chat {chat_id}")
+            return False
+
+        if queue is None:
+            queue = self._queues[chat_id] = deque()
+        queue.append(_Job(key, action, description))
+        self._pending += 1
+        if key is not None:
+            self._keys.add(key)
+
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._work(chat_id))
+        return True
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is not None:
+            return bucket
+
+        if len(self._buckets) >= self.max_buckets:
+            self._buckets = {
+                cid: b
+                for cid, b in self._buckets.items()
+                if cid in self._workers or not b.settled()
+            }
+        bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def _acquire(self, bucket: TokenBucket) -> None:
+        while True:
+            wait = max(bucket.wait_time(), self._global.wait_time())
+            if wait <= 0:
+                bucket.take()
+                self._global.take()
+                return
+            await asyncio.sleep(wait)
+
+    async def _run(self, chat_id: int, bucket: TokenBucket, job: _Job) -> bool:
+        """Выполняет действие; False — его нужно повторить."""
+        try:
+            await job.action()
+            return True
+        except TelegramRetryAfter as e:
+            delay = e.retry_after
+        except (TelegramNetworkError, TelegramServerError):
+            delay = self.retry_base * 2**job.attempts + random.uniform(0, 1)
+        except Exception as e:
+            print(f"Error running {job.description} in chat {chat_id}: {e}")
+            return True
+
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            print(
+                f"Giving up on {job.description} in chat {chat_id} "
+                f"after {job.attempts} attempts"
+            )
+            return True
+
+        bucket.pause(delay)
+        return False
+
+    async def _work(self, chat_id: int) -> None:
+        queue = self._queues[chat_id]
+        bucket = self._bucket(chat_id)
+        try:
+            while queue:
+                await self._acquire(bucket)
+                job = queue[0]
+                if await self._run(chat_id, bucket, job):
+                    queue.popleft()
+                    self._pending -= 1
+                    self._keys.discard(job.key)
+        finally:
+            self._workers.pop(chat_id, None)
+            if not queue:
+                self._queues.pop(chat_id, None)
+
+    async def close(self, timeout: float = 5) -> None:
+        """Ждёт до timeout секунд, пока очереди разойдутся, и отменяет остаток."""
+        if self._workers:
+            await asyncio.wait(list(self._workers.values()), timeout=timeout)
+        for task in list(self._workers.values()):
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
+        self._keys.clear()
+        self._pending = 0
+
+
+# Общий для обеих очередей лимит бота на все чаты.
+global_bucket = TokenBucket(config.ACTION_GLOBAL_RATE, config.ACTION_GLOBAL_RATE)
+
+action_queue = ActionDispatcher(
+    global_bucket=global_bucket,
+    chat_rate=config.ACTION_CHAT_RATE,
+    chat_burst=config.ACTION_CHAT_BURST,
+    max_pending=config.ACTION_QUEUE_MAX_PENDING,
+    chat_max_pending=config.ACTION_QUEUE_CHAT_MAX,
+    max_retries=config.ACTION_MAX_RETRIES,
+    retry_base=config.ACTION_RETRY_BASE,
+    max_buckets=config.ACTION_MAX_BUCKETS,
+)
+
+# Удаления — отдельная очередь со своим, более высоким лимитом на чат: одна
+# пачка deleteMessages убирает до 100 сообщений, и во время флуда чистка не
+# должна стоять за мутами и ответами.
+delete_queue = ActionDispatcher(
+    global_bucket=global_bucket,
+    chat_rate=config.DELETE_CHAT_RATE,
+    chat_burst=config.DELETE_CHAT_BURST,
+    max_pending=config.ACTION_QUEUE_MAX_PENDING,
+    chat_max_pending=config.ACTION_QUEUE_CHAT_MAX,
+    max_retries=config.ACTION_MAX_RETRIES,
+    retry_base=config.ACTION_RETRY_BASE,
+    max_buckets=config.ACTION_MAX_BUCKETS,
+)
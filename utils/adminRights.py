@@ -0,0 +1,229 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import ChatMember
+
+import config
+from config import redis_client
+from database.cache import TTLCache, publish_invalidation, register_cache
+from database.utils import add_or_update_chat, get_chat_ids
+
+# Права администраторов чата: hash admin_rights:{chat_id}, поле — user_id,
+# значение — JSON со статусом и флагами. Поле _fetched_at хранит время
+# последней полной загрузки через Bot API.
+ADMIN_FLAGS = (
+    "can_manage_chat",
+    "can_delete_messages",
+    "can_manage_video_chats",
+    "can_restrict_members",
+    "can_promote_members",
+    "can_change_info",
+    "can_invite_users",
+    "can_pin_messages",
+)
+ADMIN_RIGHTS_TTL = 86400
+# Через столько секунд список считается устаревшим: отдаём его как есть
+# и обновляем в фоне.
+ADMIN_RIGHTS_STALE = 600
+_FETCHED_AT = "_fetched_at"
+
+# Меняет запись одного администратора, только если список чата уже загружен.
+# ARGV[1] — user_id, ARGV[2] — JSON прав или пустая строка для удаления.
+UPDATE_MEMBER_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+return 1
+"""
+
+update_member_script = redis_client.register_script(UPDATE_MEMBER_SCRIPT)
+rights_cache = register_cache(TTLCache(maxsize=5000, ttl=60), "admin_rights")
+_refreshing: Dict[int, asyncio.Task] = {}
+
+
+def _rights_key(chat_id: int) -> str:
+    return f"admin_rights:{chat_id}"
+
+
+def _member_rights(member: ChatMember) -> Optional[dict]:
+    if member.status == "creator":
+        return {"status": "creator", **{flag: True for flag in ADMIN_FLAGS}}
+    if member.status == "administrator":
+        return {
+            "status": "administrator",
+            **{flag: bool(getattr(member, flag, False)) for flag in ADMIN_FLAGS},
+        }
+    return None
+
+
+async def _fetch_admin_rights(bot: Bot, chat_id: int) -> Dict[int, dict]:
+    try:
+        admins = await bot.get_chat_administrators(chat_id=chat_id)
+    except TelegramBadRequest as e:
+        if "there are no administrators in the private chat" in str(e):
+            return {}
+        raise
+
+    rights = {}
+    for admin in admins:
+        admin_rights = _member_rights(admin)
+        if admin_rights:
+            rights[admin.user.id] = admin_rights
+    return rights
+
+
+async def refresh_admin_rights(bot: Bot, chat_id: int) -> Dict[int, dict]:
+    chat_id = int(chat_id)
+    rights = await _fetch_admin_rights(bot, chat_id)
+
+    key = _rights_key(chat_id)
+    async with redis_client.pipeline() as pipe:
+        pipe.delete(key)
+        pipe.hset(
+            key,
+            mapping={
+                _FETCHED_AT: time.time(),
+                **{
+                    str(user_id): json.dumps(admin_rights)
+                    for user_id, admin_rights in rights.items()
+                },
+            },
+        )
+        pipe.expire(key, ADMIN_RIGHTS_TTL)
+        await pipe.execute()
+
+    await publish_invalidation(chat_id, "admin_rights")
+    rights_cache.set(chat_id, rights)
+    return rights
+
+
+def _refresh_in_background(bot: Bot, chat_id: int) -> None:
+    if chat_id in _refreshing:
+        return
+
+    async def refresh():
+        try:
+            await refresh_admin_rights(bot, chat_id)
+        except Exception as e:
+            print(f"Error refreshing admin rights for chat {chat_id}: {e}")
+        finally:
+            _refreshing.pop(chat_id, None)
+
+    _refreshing[chat_id] = asyncio.create_task(refresh())
+
+
+async def get_admin_rights(bot: Bot, chat_id: int) -> Dict[int, dict]:
+    chat_id = int(chat_id)
+    rights = rights_cache.get(chat_id)
+    if rights is not None:
+        return rights
+
+    cached = await redis_client.hgetall(_rights_key(chat_id))
+    if not cached:
+        return await refresh_admin_rights(bot, chat_id)
+
+    fetched_at = float(cached.pop(_FETCHED_AT, 0))
+    rights = {int(user_id): json.loads(value) for user_id, value in cached.items()}
+    rights_cache.set(chat_id, rights)
+
+    if time.time() - fetched_at > ADMIN_RIGHTS_STALE:
+        _refresh_in_background(bot, chat_id)
+    return rights
+
+
+async def update_admin_member(chat_id: int, member: ChatMember) -> None:
+    chat_id = int(chat_id)
+    admin_rights = _member_rights(member)
+    await update_member_script(
+        keys=[_rights_key(chat_id)],
+        args=[member.user.id, json.dumps(admin_rights) if admin_rights else ""],
+    )
+    await publish_invalidation(chat_id, "admin_rights")
+
+
+async def can_restrict(bot: Bot, chat_id: int, user_id: int) -> bool:
+    admin_rights = (await get_admin_rights(bot, chat_id)).get(user_id)
+    return bool(admin_rights and admin_rights["can_restrict_members"])
+
+
+async def restricting_admins(bot: Bot, chat_id: int) -> List[int]:
+    return [
+        user_id
+        for user_id, admin_rights in (await get_admin_rights(bot, chat_id)).items()
+        if admin_rights["can_restrict_members"]
+    ]
+
+
+async def admin_ids(bot: Bot, chat_id: int) -> List[int]:
+    return list(await get_admin_rights(bot, chat_id))
+
+
+async def full_admins(bot: Bot, chat_id: int) -> List[int]:
+    return [
+        user_id
+        for user_id, admin_rights in (await get_admin_rights(bot, chat_id)).items()
+        if all(admin_rights[flag] for flag in ADMIN_FLAGS)
+    ]
+
+
+async def get_expiring_admin_chats() -> List[int]:
+    chat_ids = await get_chat_ids()
+    if not chat_ids:
+        return []
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for chat_id in chat_ids:
+            pipe.ttl(_rights_key(chat_id))
+        ttls = await pipe.execute()
+
+    # Срок ключа ставится при загрузке, так что по нему видно, устарел ли
+    # список. -2: ключа нет, -1: ключ без срока — такие не трогаем.
+    return [
+        chat_id
+        for chat_id, ttl in zip(chat_ids, ttls)
+        if ttl == -2 or 0 <= ttl < ADMIN_RIGHTS_TTL - ADMIN_RIGHTS_STALE
+    ]
+
+
+async def refresh_expiring_admins(bot: Bot) -> None:
+    # Без запросов к Bot API списки обновляются при чтении, см. get_admin_rights.
+    if not config.ADMINS_REFRESH_FROM_API:
+        return
+
+    chat_ids = await get_expiring_admin_chats()
+    if not chat_ids:
+        return
+
+    semaphore = asyncio.Semaphore(config.ADMINS_REFRESH_CONCURRENCY)
+
+    async def refresh(chat_id: int):
+        async with semaphore:
+            try:
+                await refresh_admin_rights(bot, chat_id)
+                await add_or_update_chat(
+                    chat_id=chat_id, admins=await full_admins(bot, chat_id)
+                )
+            except Exception as e:
+                print(f"Error refreshing admins for chat {chat_id}: {e}")
+
+    await asyncio.gather(*(refresh(chat_id) for chat_id in chat_ids))
+
+
+async def admins_refresh_loop(bot: Bot) -> None:
+    interval = config.ADMINS_REFRESH_INTERVAL
+    while True:
+        await asyncio.sleep(interval + random.uniform(0, interval / 5))
+        try:
+            await refresh_expiring_admins(bot)
+        except Exception as e:
+            print(f"Error refreshing admin lists: {e}")
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Iterable
+
+from aiogram import Bot
+
+import config
+from BaseModeration.BaseModerationHelpers import kick_user
+from config import redis_client
+from utils.messageDeleter import message_deleter
+
+# Незавершённые капчи переживают перезапуск бота:
+#  captcha:deadlines — sorted set, member "chat_id:user_id", score — дедлайн;
+#  captcha_challenge:{chat_id}:{user_id} — id сообщения с капчей;
+#  captcha_message:{chat_id}:{message_id} — кто ещё не прошёл эту капчу.
+DEADLINES_KEY = "captcha:deadlines"
+
+# Атомарно забирает до ARGV[2] просроченных капч: каждую получит ровно один
+# процесс, даже если планировщик запущен в нескольких.
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+# Решение капчи снимает дедлайн тем же ZREM, что и CLAIM_SCRIPT, поэтому из
+# кнопки и планировщика капчу получает кто-то один. 0 — дедлайн уже забран
+# планировщиком, а капча ещё не снята: пользователя вот-вот исключат.
+SOLVE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 and redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+return 1
+"""
+
+claim_script = redis_client.register_script(CLAIM_SCRIPT)
+solve_script = redis_client.register_script(SOLVE_SCRIPT)
+
+
+def _challenge_key(chat_id: int, user_id: int) -> str:
+    return f"captcha_challenge:{chat_id}:{user_id}"
+
+
+def _message_key(chat_id: int, message_id: int) -> str:
+    return f"captcha_message:{chat_id}:{message_id}"
+
+
+async def create_challenges(
+    chat_id: int, user_ids: Iterable[int], message_id: int
+) -> None:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    deadline = time.time() + config.CAPTCHA_TIMEOUT
+    ttl = config.CAPTCHA_TIMEOUT * 2
+    async with redis_client.pipeline() as pipe:
+        pipe.zadd(
+            DEADLINES_KEY, {f"{chat_id}:{user_id}": deadline for user_id in user_ids}
+        )
+        for user_id in user_ids:
+            pipe.setex(_challenge_key(chat_id, user_id), ttl, message_id)
+        pipe.sadd(_message_key(chat_id, message_id), *user_ids)
+        pipe.expire(_message_key(chat_id, message_id), ttl)
+        await pipe.execute()
+
+
+async def _release_message(chat_id: int, user_id: int, message_id: int) -> bool:
+    """Убирает пользователя из сообщения с капчей; True — в нём больше никто не ждёт."""
+    message_key = _message_key(chat_id, message_id)
+    async with redis_client.pipeline() as pipe:
+        pipe.srem(message_key, user_id)
+        pipe.scard(message_key)
+        _, remaining = await pipe.execute()
+    return remaining == 0
+
+
+async def solve_challenge(chat_id: int, user_id: int) -> bool:
+    """Снимает капчу; False — время вышло и планировщик уже исключает."""
+    challenge_key = _challenge_key(chat_id, user_id)
+    if not await solve_script(
+        keys=[DEADLINES_KEY, challenge_key], args=[f"{chat_id}:{user_id}"]
+    ):
+        return False
+
+    message_id = await redis_client.getdel(challenge_key)
+    if message_id is not None:
+        await _release_message(chat_id, user_id, int(message_id))
+    return True
+
+
+async def _expire_challenge(bot: Bot, member: str) -> None:
+    chat_id, user_id = map(int, member.split(":"))
+    try:
+        # Ключа капчи нет — её уже решили, исключать некого.
+        message_id = await redis_client.getdel(_challenge_key(chat_id, user_id))
+        if message_id is None:
+            return
+
+        if config.CAPTCHA_TIMEOUT_ACTION == "kick":
+            await kick_user(bot, chat_id, user_id)
+
+        if await _release_message(chat_id, user_id, int(message_id)):
+            message_deleter.schedule(bot, chat_id, [int(message_id)])
+    except Exception as e:
+        print(f"Error expiring captcha for {user_id} in chat {chat_id}: {e}")
+
+
+async def expire_challenges(bot: Bot) -> int:
+    due = await claim_script(
+        keys=[DEADLINES_KEY], args=[time.time(), config.CAPTCHA_POLL_BATCH]
+    )
+    if not due:
+        return 0
+
+    semaphore = asyncio.Semaphore(config.JOIN_CONCURRENCY)
+
+    async def expire(member: str):
+        async with semaphore:
+            await _expire_challenge(bot, member)
+
+    await asyncio.gather(*(expire(member) for member in due))
+    return len(due)
+
+
+async def captcha_timeout_loop(bot: Bot) -> None:
+    while True:
+        try:
+            # Полная пачка — значит, просроченные ещё есть: забираем без паузы.
+            if await expire_challenges(bot) >= config.CAPTCHA_POLL_BATCH:
+                continue
+        except Exception as e:
+            print(f"Error expiring captchas: {e}")
+        await asyncio.sleep(config.CAPTCHA_POLL_INTERVAL)
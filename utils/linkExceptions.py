@@ -0,0 +1,130 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+TELEGRAM_HOSTS = frozenset({"t.me", "telegram.me", "telegram.dog"})
+
+
+def _normalize_host(host: str) -> str:
+    host = host.strip().rstrip(".").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def normalize_url(url: str) -> Tuple[str, str]:
+    """Возвращает (домен, путь) без схемы, www, порта и завершающего слэша."""
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+    except ValueError:
+        return "", ""
+
+    host = _normalize_host(host)
+    path = parts.path.rstrip("/")
+    if host in TELEGRAM_HOSTS:
+        path = path.lower()
+    return host, path
+
+
+class _DomainNode:
+    __slots__ = ("children", "prefixes")
+
+    def __init__(self):
+        self.children: Dict[str, "_DomainNode"] = {}
+        self.prefixes: Set[str] = set()
+
+
+class DomainTrie:
+    """Домены в дереве по меткам справа налево: com → example → www.
+
+    Исключение для домена действует и на все его поддомены; у узла
+    хранятся префиксы путей, пустой префикс разрешает весь домен.
+    """
+
+    def __init__(self):
+        self._root = _DomainNode()
+
+    @staticmethod
+    def _labels(host: str) -> Optional[List[str]]:
+        labels = host.split(".")
+        # "site..com" и подобные — не домен, такое исключение пропускаем.
+        if not all(labels):
+            return None
+        return labels[::-1]
+
+    def add(self, host: str, path: str = "") -> None:
+        labels = self._labels(host)
+        if labels is None:
+            return
+
+        node = self._root
+        for label in labels:
+            node = node.children.setdefault(label, _DomainNode())
+        node.prefixes.add(path)
+
+    def match(self, host: str, path: str = "") -> bool:
+        node = self._root
+        for label in self._labels(host) or ():
+            node = node.children.get(label)
+            if node is None:
+                return False
+            if any(
+                not prefix or path == prefix or path.startswith(f"{prefix}/")
+                for prefix in node.prefixes
+            ):
+                return True
+        return False
+
+
+class LinkExceptions:
+    """Разобранный список исключений антиспама: домены, юзернеймы и id."""
+
+    def __init__(self, exceptions: Iterable):
+        self.domains = DomainTrie()
+        self.usernames: Set[str] = set()
+        self.user_ids: Set[int] = set()
+
+        for exception in exceptions:
+            self._add(exception)
+
+    def _add(self, exception) -> None:
+        if isinstance(exception, int):
+            self.user_ids.add(exception)
+            return
+
+        exception = str(exception).strip()
+        if not exception:
+            return
+        if exception.lstrip("-").isdigit():
+            self.user_ids.add(int(exception))
+        elif exception.startswith("@"):
+            self.usernames.add(exception[1:].lower())
+        else:
+            host, path = normalize_url(exception)
+            if host in TELEGRAM_HOSTS and path:
+                self.usernames.add(path.strip("/").split("/")[0])
+            elif host:
+                self.domains.add(host, path)
+
+    def allows_user(self, user_id: Optional[int]) -> bool:
+        return user_id in self.user_ids
+
+    def allows_mention(self, text: str) -> bool:
+        return text.lstrip("@").lower() in self.usernames
+
+    def allows_url(self, url: str) -> bool:
+        host, path = normalize_url(url)
+        if not host:
+            return False
+        if host in TELEGRAM_HOSTS:
+            username = path.strip("/").split("/")[0]
+            if username and username in self.usernames:
+                return True
+        return self.domains.match(host, path)
@@ -0,0 +1,63 @@
+import asyncio
+import functools
+from typing import Dict, Iterable, Optional, Set
+
+from aiogram import Bot
+
+from utils.actionQueue import delete_queue
+
+# Ограничение Bot API для deleteMessages.
+DELETE_BATCH_SIZE = 100
+
+
+class MessageDeleter:
+    def __init__(self, delay: float = 0.3):
+        self.delay = delay
+        self._pending: Dict[int, Set[int]] = {}
+        self._bots: Dict[int, Bot] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def schedule(self, bot: Bot, chat_id: int, message_ids: Iterable) -> None:
+        self._pending.setdefault(chat_id, set()).update(
+            int(message_id) for message_id in message_ids
+        )
+        self._bots[chat_id] = bot
+
+        if chat_id not in self._tasks:
+            self._tasks[chat_id] = asyncio.create_task(self._flush_later(chat_id))
+
+    async def _flush_later(self, chat_id: int) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._tasks.pop(chat_id, None)
+        self._flush(chat_id)
+
+    def _flush(self, chat_id: int) -> None:
+        message_ids = self._pending.pop(chat_id, None)
+        bot: Optional[Bot] = self._bots.pop(chat_id, None)
+        if not message_ids or not bot:
+            return
+
+        # Удаление идёт через очередь действий, чтобы 429 от Telegram не
+        # терял пачку, а ждал retry_after.
+        ids = sorted(message_ids)
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            chunk = ids[start : start + DELETE_BATCH_SIZE]
+            delete_queue.enqueue(
+                chat_id,
+                functools.partial(
+                    bot.delete_messages, chat_id=chat_id, message_ids=chunk
+                ),
+                description=f"deletion of {len(chunk)} messages",
+            )
+
+    async def close(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
+        for chat_id in list(self._pending):
+            self._flush(chat_id)
+
+
+message_deleter = MessageDeleter()
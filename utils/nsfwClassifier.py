@@ -0,0 +1,235 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Set, Tuple
+
+from aiogram.types import PhotoSize
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Модель живёт только в процессах пула. opennsfw2 (и TensorFlow вместе с ним)
+# импортируется внутри воркера, чтобы не тянуть его в процесс бота до fork.
+_model = None
+
+# Сторона квадрата, до которой opennsfw2 масштабирует картинку.
+MODEL_INPUT_SIZE = 224
+
+
+def _init_worker() -> None:
+    global _model
+    import opennsfw2 as n2
+
+    _model = n2.make_open_nsfw_model()
+
+
+def _predict_batch(images_data: List[bytes]) -> List[Optional[float]]:
+    import numpy as np
+    import opennsfw2 as n2
+    from PIL import Image
+
+    images = []
+    indexes = []
+    for index, image_data in enumerate(images_data):
+        try:
+            with Image.open(io.BytesIO(image_data)) as pil_image:
+                images.append(n2.preprocess_image(pil_image, n2.Preprocessing.YAHOO))
+            indexes.append(index)
+        except Exception:
+            continue
+
+    scores: List[Optional[float]] = [None] * len(images_data)
+    if images:
+        predictions = _model.predict(np.stack(images), verbose=0)
+        for index, prediction in zip(indexes, predictions):
+            scores[index] = float(prediction[1])
+    return scores
+
+
+def pick_photo_size(photos: Sequence[PhotoSize]) -> PhotoSize:
+    # Самый маленький размер, который модели не придётся увеличивать.
+    suitable = [
+        photo
+        for photo in photos
+        if min(photo.width, photo.height) >= MODEL_INPUT_SIZE
+    ]
+    if suitable:
+        return min(suitable, key=lambda photo: photo.width * photo.height)
+    return max(photos, key=lambda photo: photo.width * photo.height)
+
+
+def image_dhash(image_data: bytes, hash_size: int = 8) -> str:
+    # Разностный хеш: пересжатые и слегка изменённые копии картинки
+    # дают тот же результат.
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_data)) as pil_image:
+        pixels = list(
+            pil_image.convert("L")
+            .resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+            .getdata()
+        )
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            value = value << 1 | (pixels[offset + column] > pixels[offset + column + 1])
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+class NsfwQueueFull(Exception):
+    pass
+
+
+class NsfwClassifier:
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        batch_size: int,
+        batch_latency_ms: int,
+        queue_timeout: float,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.batch_size = batch_size
+        self.batch_latency = batch_latency_ms / 1000
+        self._pending = 0
+        self._batch: List[Tuple[bytes, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(workers)
+        # Место в очереди: при переполнении новые картинки ждут, а не
+        # пропускаются без проверки.
+        self._admission = asyncio.Semaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.batches_total = 0
+        self.images_total = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self._pending,
+            "batches_total": self.batches_total,
+            "images_total": self.images_total,
+            "batch_fill": (
+                self.images_total / (self.batches_total * self.batch_size)
+                if self.batches_total
+                else 0.0
+            ),
+        }
+
+    async def classify(self, image_data: bytes) -> float:
+        """NsfwQueueFull — если место в очереди не освободилось за queue_timeout."""
+        try:
+            await asyncio.wait_for(self._admission.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise NsfwQueueFull(
+                f"{self._pending} images queued, no slot in {self.queue_timeout}s"
+            ) from None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((image_data, future))
+        self._pending += 1
+        try:
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_latency, self._flush)
+            return await future
+        finally:
+            self._pending -= 1
+            self._admission.release()
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch = self._batch[: self.batch_size]
+        self._batch = self._batch[self.batch_size :]
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+        if self._batch:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_latency, self._flush
+            )
+
+    async def _run_batch(self, batch: List[Tuple[bytes, asyncio.Future]]) -> None:
+        async with self._slots:
+            try:
+                loop = asyncio.get_running_loop()
+                scores = await loop.run_in_executor(
+                    self._get_executor(), _predict_batch, [data for data, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        self.batches_total += 1
+        self.images_total += len(batch)
+        logger.debug(
+            "NSFW batch: %d/%d images, %d still queued",
+            len(batch),
+            self.batch_size,
+            self._pending - len(batch),
+        )
+
+        for (_, future), score in zip(batch, scores):
+            if future.done():
+                continue
+            if score is None:
+                future.set_exception(ValueError("Cannot decode image"))
+            else:
+                future.set_result(score)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+nsfw_classifier = NsfwClassifier(
+    config.NSFW_WORKERS,
+    config.NSFW_MAX_PENDING,
+    config.NSFW_BATCH_SIZE,
+    config.NSFW_BATCH_LATENCY_MS,
+    config.NSFW_QUEUE_TIMEOUT,
+)
+
+
+async def nsfw_metrics_loop() -> None:
+    """Раз в NSFW_METRICS_INTERVAL печатает глубину очереди и заполнение пачек."""
+    reported = None
+    while True:
+        await asyncio.sleep(config.NSFW_METRICS_INTERVAL)
+        metrics = nsfw_classifier.metrics()
+        # Пока фильтр простаивает, одно и то же не повторяем.
+        if metrics == reported:
+            continue
+        reported = metrics
+        print(
+            f"NSFW classifier: queue depth {metrics['queue_depth']}, "
+            f"{metrics['images_total']} images in {metrics['batches_total']} "
+            f"batches, batch fill {metrics['batch_fill']:.0%}"
+        )
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Iterable, List, Tuple
+
+from aiogram import Bot
+
+import config
+from BaseModeration.BaseModerationHelpers import kick_user, restrict_user
+from config import redis_client
+
+RAID_OFF = 0
+RAID_ON = 1
+RAID_STARTED = 2
+
+# Скользящее окно вступлений: score — время в мс, member — user_id.
+# KEYS[1] — окно чата, KEYS[2] — флаг карантина. ARGV: now, окно, порог,
+# длительность карантина, затем id вступивших. Каждое вступление сверх
+# порога продлевает карантин, поэтому он снимается сам, когда волна стихнет.
+# Возвращает {число вступлений в окне, RAID_OFF | RAID_ON | RAID_STARTED}.
+RAID_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local threshold = tonumber(ARGV[3])
+local lockdown = tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+for i = 5, #ARGV do
+    redis.call('ZADD', KEYS[1], now, ARGV[i])
+end
+redis.call('PEXPIRE', KEYS[1], window)
+
+local joins = redis.call('ZCARD', KEYS[1])
+local raid = redis.call('EXISTS', KEYS[2])
+if joins >= threshold then
+    redis.call('SET', KEYS[2], '1', 'PX', lockdown)
+    if raid == 0 then
+        return {joins, 2}
+    end
+    return {joins, 1}
+end
+return {joins, raid}
+"""
+
+raid_script = redis_client.register_script(RAID_SCRIPT)
+
+
+async def register_joins(chat_id: int, user_ids: Iterable[int]) -> Tuple[int, int]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0, int(await redis_client.exists(f"raid:{chat_id}"))
+
+    joins, state = await raid_script(
+        keys=[f"raid:joins:{chat_id}", f"raid:{chat_id}"],
+        args=[
+            int(time.time() * 1000),
+            config.RAID_WINDOW * 1000,
+            config.RAID_JOIN_THRESHOLD,
+            config.RAID_LOCKDOWN * 1000,
+            *user_ids,
+        ],
+    )
+    return int(joins), int(state)
+
+
+async def lockdown_members(bot: Bot, chat_id: int, user_ids: List[int]) -> int:
+    """Ограничивает или исключает вступивших во время рейда, параллельно.
+
+    Мут ставится на RAID_LOCKDOWN секунд и снимается Telegram сам.
+    """
+    semaphore = asyncio.Semaphore(config.RAID_CONCURRENCY)
+    until_date = int(time.time()) + config.RAID_LOCKDOWN
+
+    async def apply(user_id: int) -> bool:
+        async with semaphore:
+            if config.RAID_ACTION == "kick":
+                return await kick_user(bot, chat_id, user_id)
+            return await restrict_user(bot, chat_id, user_id, until_date=until_date)
+
+    results = await asyncio.gather(*(apply(user_id) for user_id in user_ids))
+    return sum(results)
@@ -38,4 +38,9 @@ class RulesStates(StatesGroup):
     editing_text = State()
 
 class ModStates(StatesGroup):
-    managing_chat = State()
\ No newline at end of file
+    managing_chat = State()
+
+class ForbiddenWordsStates(StatesGroup):
+    ADD = State()
+    REMOVE = State()
+    DURATION = State()
@@ -0,0 +1,153 @@
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Невидимые символы, которыми разбивают слова, чтобы обойти фильтр.
+ZERO_WIDTH_CHARS = "\u00ad\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\ufeff"
+
+# Похожие друг на друга латинские и кириллические буквы (и цифры) сводятся
+# к одному знаку «скелета», чтобы «pоrn» с кириллической «о» совпадал с
+# «porn». Скелет — заглавная латиница: после casefold заглавных в тексте
+# нет, и скелет не путается с обычными буквами.
+CONFUSABLES = {
+    "A": "aа",
+    "B": "bв",
+    "C": "cс",
+    "E": "eе",
+    "H": "hн",
+    "I": "iі",
+    "J": "jј",
+    "K": "kк",
+    "M": "mм",
+    "O": "oо0",
+    "P": "pр",
+    "S": "sѕ",
+    "T": "tт",
+    "X": "xх",
+    "Y": "yу",
+    "3": "з",
+}
+
+_ZERO_WIDTH_TRANSLATION = str.maketrans({char: None for char in ZERO_WIDTH_CHARS})
+_SKELETON_TRANSLATION = str.maketrans(
+    {char: canonical for canonical, chars in CONFUSABLES.items() for char in chars}
+)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+LATIN = 1
+CYRILLIC = 2
+
+
+def _scripts(text: str) -> int:
+    scripts = 0
+    for char in text:
+        if "a" <= char <= "z":
+            scripts |= LATIN
+        elif "\u0400" <= char <= "\u04ff":
+            scripts |= CYRILLIC
+    return scripts
+
+
+def _scripts_match(pattern: int, text: int) -> bool:
+    # Слова одной письменности сравниваются как есть: латинское «bot» не
+    # совпадает с кириллическим «вот», хотя скелет у них общий. Смешанные
+    # и чисто цифровые слова сравниваются только по скелету.
+    if pattern in (LATIN, CYRILLIC) and text in (LATIN, CYRILLIC):
+        return pattern == text
+    return True
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # Комбинируемые диакритические знаки тоже выбрасываем: «а́» == «а».
+    text = "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    )
+    text = text.translate(_ZERO_WIDTH_TRANSLATION)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def skeleton(text: str) -> str:
+    """Нормализованный текст с похожими буквами, сведёнными к одной."""
+    return text.translate(_SKELETON_TRANSLATION)
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class WordMatcher:
+    """Автомат Ахо — Корасик: поиск слов из списка за один проход по тексту.
+
+    Слово совпадает только целиком: «ass» не находится внутри «class».
+    Поиск идёт по скелету текста, см. CONFUSABLES.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Все слова, которые заканчиваются в состоянии:
+        # (слово, длина, письменности слова).
+        self._output: List[List[Tuple[str, int, int]]] = [[]]
+
+        for word in words:
+            self._add(word)
+        self._build()
+
+    def _add(self, word: str) -> None:
+        normalized = normalize_text(word)
+        if not normalized:
+            return
+
+        state = 0
+        for char in skeleton(normalized):
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append((word, len(normalized), _scripts(normalized)))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+
+                # Слова, которые являются суффиксом пути, тоже совпадают здесь.
+                self._output[next_state] = (
+                    self._output[next_state] + self._output[self._fail[next_state]]
+                )
+
+    def search(self, text: str) -> Optional[str]:
+        """Возвращает первое найденное слово из списка или None."""
+        if len(self._goto) == 1:
+            return None
+
+        text = normalize_text(text)
+        state = 0
+        for index, char in enumerate(skeleton(text)):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if not self._output[state] or not _is_boundary(text, index + 1):
+                continue
+            for word, length, scripts in self._output[state]:
+                start = index - length + 1
+                if _is_boundary(text, start - 1) and _scripts_match(
+                    scripts, _scripts(text[start : index + 1])
+                ):
+                    return word
+        return None